@@ -0,0 +1,56 @@
+'''
+Measures the cold start of the package: every import runs in a fresh interpreter,
+so nothing is cached in sys.modules. The heavy column lists which of matplotlib,
+streamlit and pandas got loaded by the import.
+The last row imports those three directly, that is what importing visualization
+used to cost before they were imported lazily.
+Run from the repository root with: python -m benchmarks.bench_import
+'''
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+HEAVY = ('matplotlib', 'streamlit', 'pandas')
+
+IMPORTS = {
+    'dice_probability': 'import dice_probability',
+    'dice_probability.core': 'import dice_probability.core',
+    'dice_probability.visualization': 'import dice_probability.visualization',
+    'everything': 'import dice_probability, dice_probability.visualization, dice_probability.parallel',
+    'plotting and ui deps': 'import matplotlib.pyplot, streamlit, pandas',
+}
+
+#Runs the import and prints the time it took and the heavy modules it loaded
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(seconds, ','.join(name for name in {heavy!r} if name in sys.modules))
+'''
+
+
+def time_import(statement, repeat):
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', SCRIPT.format(statement = statement, heavy = HEAVY)],
+                                capture_output = True, text = True, check = True).stdout.split()
+        times.append(float(output[0]))
+    return statistics.median(times), output[1] if len(output) > 1 else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Import time of dice_probability in fresh interpreters.')
+    parser.add_argument('--repeat', type = int, default = 5, help = 'interpreters started per import')
+    args = parser.parse_args()
+
+    print(f"{'import':<34}{'median (ms)':>13}  heavy modules loaded")
+    for name, statement in IMPORTS.items():
+        seconds, heavy = time_import(statement, args.repeat)
+        print(f"{name:<34}{seconds * 1000:>13.1f}  {heavy}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+'''
+Compares the exact keep highest/lowest functions against the old float based Adv.
+Run from the repository root with: python -m benchmarks.bench_keep
+'''
+
+import timeit
+
+from dice_probability.core import create_die, d20, keep_highest
+
+
+def float_adv(die = d20, n = 2):
+    #The old float version of Adv, kept here so we can compare speed and precision
+    com_cdf = {roll: (roll / len(die)) ** n for roll in die}
+    pmf = {}
+    for roll, prob in com_cdf.items():
+        if roll == 1:
+            pmf[roll] = prob
+        else:
+            pmf[roll] = prob - com_cdf[roll - 1]
+    return {key: int(round(value * len(die)**n)) for key, value in pmf.items()}
+
+
+def main():
+    print(f"{'case':<24}{'float Adv (ms)':>16}{'exact (ms)':>14}{'float error':>14}")
+    for sides, n in [(20, 2), (20, 5), (20, 20), (100, 10), (100, 20)]:
+        die = create_die(sides)
+        repeats = 20
+        old_time = timeit.timeit(lambda: float_adv(die, n), number=repeats) / repeats * 1000
+        new_time = timeit.timeit(lambda: keep_highest(die, n), number=repeats) / repeats * 1000
+
+        exact = keep_highest(die, n)
+        old = float_adv(die, n)
+        error = sum(abs(old[roll] - exact.get(roll, 0)) for roll in old)
+
+        print(f"{f'd{sides} keep 1 of {n}':<24}{old_time:>16.3f}{new_time:>14.3f}{error:>14.3g}")
+
+    for sides, n, k in [(6, 4, 3), (20, 10, 5), (100, 20, 10)]:
+        die = create_die(sides)
+        new_time = timeit.timeit(lambda: keep_highest(die, n, k), number=3) / 3 * 1000
+        print(f"{f'd{sides} keep {k} of {n}':<24}{'-':>16}{new_time:>14.3f}{'-':>14}")
+
+
+if __name__ == '__main__':
+    main()
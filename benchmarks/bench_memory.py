@@ -0,0 +1,43 @@
+'''
+Compares the memory used by a 20 die pool stored as occurence dictionaries
+and as a Distribution.
+Run from the repository root with: python -m benchmarks.bench_memory
+'''
+
+import sys
+
+from dice_probability.core import Adv, d6, d8, d20, many_dice
+from dice_probability.distribution import Distribution
+
+
+def dict_size(dicts):
+    #The dictionaries themselves plus every key and value they hold
+    return sum(sys.getsizeof(die) + sum(sys.getsizeof(roll) + sys.getsizeof(occ) for roll, occ in die.items())
+               for die in dicts)
+
+
+def distribution_size(distribution):
+    #getsizeof already counts the array data, nbytes adds the python ints of object arrays
+    counts = distribution.counts
+    return sys.getsizeof(distribution) + sys.getsizeof(counts) + distribution.nbytes - counts.nbytes
+
+
+def main():
+    pools = {'d20 + 19d6': (d20,) + (d6,) * 19,
+             'adv d20 + 19d8': (Adv(d20, 3),) + (d8,) * 19,
+             '20d20': (d20,) * 20}
+
+    print(f"{'pool':<18}{'rolls':>7}{'dicts (bytes)':>16}{'Distribution (bytes)':>22}{'ratio':>8}")
+    for name, dice in pools.items():
+        dicts = many_dice(*dice, with_crit = True)
+        distribution = Distribution.from_dict(dice[0], with_crit = True)
+        for die in dice[1:]:
+            distribution = distribution + Distribution.from_dict(die)
+
+        old = dict_size(dicts)
+        new = distribution_size(distribution)
+        print(f"{name:<18}{len(distribution):>7}{old:>16}{new:>22}{old / new:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+'''
+Shows how run_scenarios scales from 1 worker up to one worker per core.
+Run from the repository root with: python -m benchmarks.bench_parallel [number of scenarios]
+'''
+
+import itertools
+import os
+import sys
+import time
+
+from dice_probability.parallel import run_scenarios
+from dice_probability.scenario import Scenario
+
+
+def make_scenarios(count):
+    help_options = [(), (8,), (6,), (4,), (8, 6), (6, 4), (8, 8, 4)]
+    combos = itertools.product(range(-3, 4), help_options, range(-2, 9), range(10, 21), range(0, 3))
+    scenarios = [Scenario(advantage, help_dice, mod, {'defense': defense, 'dr': dr, 'impact': True})
+                 for advantage, help_dice, mod, defense, dr in combos]
+    return list(itertools.islice(itertools.cycle(scenarios), count))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    scenarios = make_scenarios(count)
+
+    print(f"{count} scenarios")
+    print(f"{'workers':>8}{'seconds':>10}{'scenarios/s':>14}{'speedup':>10}")
+    baseline = None
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        start = time.perf_counter()
+        run_scenarios(scenarios, workers = workers)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"{workers:>8}{seconds:>10.2f}{count / seconds:>14.0f}{baseline / seconds:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+'''
+Compares recalculating a pool with many_dice against updating a DicePool,
+for the changes the app makes: toggling a help d4 and changing the advantage.
+Run from the repository root with: python -m benchmarks.bench_pool
+'''
+
+import timeit
+
+from dice_probability.cache import set_cache_enabled
+from dice_probability.core import many_dice
+from dice_probability.pool import DicePool
+from dice_probability.scenario import Scenario
+
+
+def toggle_d4(pool):
+    pool.add_die(4)
+    pool.distribution()
+    pool.remove_die(4)
+    pool.distribution()
+
+
+def bump_advantage(pool):
+    pool.set_advantage(pool.advantage + 1)
+    pool.distribution()
+    pool.set_advantage(pool.advantage - 1)
+    pool.distribution()
+
+
+def recalculate(scenario):
+    #The same two changes done by recalculating the whole pool each time
+    many_dice(Scenario(scenario.advantage, scenario.help_dice + (4,)).dice(), with_crit = True)
+    many_dice(scenario.dice(), with_crit = True)
+
+
+def main(number = 20):
+    set_cache_enabled(False)
+    print(f"{'help dice':>10}{'many_dice (ms)':>16}{'toggle d4 (ms)':>16}{'advantage (ms)':>16}")
+    for help_count in (3, 10, 30, 60):
+        scenario = Scenario(2, (8, 6) * (help_count // 2) + (4,) * (help_count % 2))
+        pool = DicePool.from_scenario(scenario)
+        pool.distribution()
+
+        full = timeit.timeit(lambda: recalculate(scenario), number = number) / number
+        toggle = timeit.timeit(lambda: toggle_d4(pool), number = number) / number
+        advantage = timeit.timeit(lambda: bump_advantage(pool), number = number) / number
+        print(f"{help_count:>10}{full * 1000:>16.3f}{toggle * 1000:>16.3f}{advantage * 1000:>16.3f}")
+    set_cache_enabled(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+'''
+Compares adding identical dice one at a time with repeated squaring.
+Run from the repository root with: python -m benchmarks.bench_power
+'''
+
+import timeit
+
+from dice_probability import engine
+from dice_probability.cache import set_cache_enabled
+from dice_probability.core import create_die, d20, many_dice
+
+
+def main():
+    set_cache_enabled(False)
+
+    print(f"{'pool':<8}{'one by one (ms)':>17}{'squaring (ms)':>15}{'speedup':>9}{'many_dice crit (ms)':>21}")
+    for count, sides in [(10, 6), (20, 6), (40, 10), (100, 10)]:
+        die = create_die(sides)
+        die_array = engine.to_array(die)
+        repeats = 20
+
+        sequential = timeit.timeit(lambda: engine.sum_dice([die_array] * count), number=repeats) / repeats * 1000
+        squaring = timeit.timeit(lambda: engine.power(die_array, count), number=repeats) / repeats * 1000
+        with_crit = timeit.timeit(lambda: many_dice(d20, *[die] * count, with_crit=True),
+                                  number=repeats) / repeats * 1000
+
+        print(f"{f'{count}d{sides}':<8}{sequential:>17.3f}{squaring:>15.3f}{sequential / squaring:>9.1f}{with_crit:>21.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+'''
+Load test for the dice server (dice_probability/server.py).
+
+A number of clients each keep one connection open and send requests as fast as the
+server answers them. The queries are drawn from a fixed set of distinct scenarios,
+so with a small set most requests hit the warm cache or get coalesced.
+Reports the p50 and p99 latency, the throughput and the server stats.
+
+Run from the repository root, with a server already running:
+    python -m benchmarks.load_test --port 8765
+or let the load test start one itself:
+    python -m benchmarks.load_test --start
+'''
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ENDPOINTS = ('/check', '/attack_outcomes', '/average_damage')
+
+
+def make_queries(distinct, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(distinct):
+        body = {'advantage': rng.randint(-3, 3),
+                'help_dice': [rng.choice((4, 6, 8)) for _ in range(rng.randint(0, 4))],
+                'mod': rng.randint(0, 5),
+                'attack': {'defense': rng.randint(10, 20), 'base_damage': rng.randint(1, 4)}}
+        queries.append((rng.choice(ENDPOINTS), json.dumps(body).encode()))
+    return queries
+
+
+async def request(reader, writer, method, path, body = b''):
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def client(host, port, queries, count, rng, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    for _ in range(count):
+        path, body = rng.choice(queries)
+        start = time.perf_counter()
+        status, _ = await request(reader, writer, 'POST', path, body)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(status)
+    writer.close()
+
+
+async def wait_for_server(host, port, timeout = 30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(args):
+    await wait_for_server(args.host, args.port)
+    queries = make_queries(args.distinct, args.seed)
+    latencies, errors = [], []
+    per_client = args.requests // args.concurrency
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, queries, per_client,
+                                  random.Random(args.seed + i), latencies, errors)
+                           for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f'requests:     {len(latencies)} ({len(errors)} errors) from {args.concurrency} clients, '
+          f'{args.distinct} distinct queries')
+    print(f'throughput:   {len(latencies) / elapsed:.0f} requests/s')
+    print(f'latency p50:  {statistics.median(latencies) * 1000:.2f} ms')
+    print(f'latency p99:  {p99 * 1000:.2f} ms')
+    print(f'server stats: {stats.decode()}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Load test for the dice server.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8765)
+    parser.add_argument('--start', action = 'store_true', help = 'start a server for the test')
+    parser.add_argument('--requests', type = int, default = 5000)
+    parser.add_argument('--concurrency', type = int, default = 50)
+    parser.add_argument('--distinct', type = int, default = 200, help = 'number of different queries')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+
+    server = None
+    if args.start:
+        server = subprocess.Popen([sys.executable, '-m', 'dice_probability.server', '--port', str(args.port)])
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
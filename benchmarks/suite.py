@@ -0,0 +1,131 @@
+'''
+Benchmark suite for the hot paths in core.py and visualization.py.
+
+Every case is timed a number of times (the best and the median time are reported)
+and run once more under tracemalloc for its peak memory. The results can be saved
+as JSON and compared with an earlier run. If a case got slower than the baseline by
+more than the threshold, the run exits with status 1.
+
+Run from the repository root:
+    python -m benchmarks.suite --save results.json
+    python -m benchmarks.suite --baseline results.json --threshold 0.25
+'''
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from dice_probability.cache import set_cache_enabled
+from dice_probability.core import (Adv, attack_outcomes, check, create_die, d4, d6, d8, d20,
+                                   die_probs, keep_highest, many_dice)
+from dice_probability.sweep import attack_sweep
+
+d100 = create_die(100)
+
+
+def _calculate_cdf_case():
+    from dice_probability.visualization import calculate_cdf
+
+    probabilities = die_probs(many_dice(d20, *[d8] * 30)[0])
+    return lambda: calculate_cdf(probabilities)
+
+
+#name: function that returns the callable to time, so setup isn't part of the measurement
+CASES = {
+    'app_small_pool': lambda: lambda: die_probs(many_dice(Adv(d20, 3), d8, d6, d4)[0]),
+    'app_check': lambda: lambda: check(Adv(d20, 2), d8, d8, mod = 3),
+    'pool_20_dice_crit': lambda: lambda: many_dice(d20, *[d8] * 10, *[d6] * 9, with_crit = True),
+    'pool_20d20': lambda: lambda: many_dice(*[d20] * 20),
+    'adv_20_d100': lambda: lambda: Adv(d100, 20),
+    'keep_10_of_20_d20': lambda: lambda: keep_highest(d20, 20, 10),
+    'attack_outcomes': lambda: lambda: attack_outcomes(Adv(d20, 2), d8, mod = 5, defense = 15,
+                                                       impact = True, gwf = True, dr = 1),
+    'attack_sweep_10k': lambda: lambda: attack_sweep(Adv(d20, 2), d8, defense = range(0, 100),
+                                                     mod = range(-2, 23), dr = range(4), impact = True),
+    'calculate_cdf_wide': _calculate_cdf_case,
+}
+
+
+def run_case(function, repeat):
+    #One warm up call, then the timed calls, then one call for the peak memory
+    function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'best_s': min(times), 'median_s': statistics.median(times), 'peak_bytes': peak}
+
+
+def run_suite(names, repeat):
+    #The distribution cache would turn every repeat into a lookup, so it is turned off
+    set_cache_enabled(False)
+    try:
+        return {name: run_case(CASES[name](), repeat) for name in names}
+    finally:
+        set_cache_enabled(True)
+
+
+def compare(results, baseline, threshold):
+    '''Returns the names of the cases whose median time grew by more than threshold.'''
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if result['median_s'] > baseline[name]['median_s'] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Benchmark the dice_probability hot paths.')
+    parser.add_argument('-k', dest = 'pattern', default = '', help = 'only run cases with this text in their name')
+    parser.add_argument('--repeat', type = int, default = 10, help = 'timed runs per case (default 10)')
+    parser.add_argument('--save', help = 'write the results to this JSON file')
+    parser.add_argument('--baseline', help = 'JSON file from an earlier run to compare with')
+    parser.add_argument('--threshold', type = float, default = 0.2,
+                        help = 'allowed slowdown against the baseline, 0.2 is 20%% (default)')
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if args.pattern in name]
+    results = run_suite(names, args.repeat)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['cases']
+
+    print(f"{'case':<22}{'best (ms)':>11}{'median (ms)':>13}{'peak (KiB)':>12}{'vs baseline':>13}")
+    for name, result in results.items():
+        change = ''
+        if name in baseline:
+            change = f"{result['median_s'] / baseline[name]['median_s'] - 1:+.0%}"
+        print(f"{name:<22}{result['best_s'] * 1000:>11.3f}{result['median_s'] * 1000:>13.3f}"
+              f"{result['peak_bytes'] / 1024:>12.1f}{change:>13}")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'repeat': args.repeat,
+                       'cases': results}, file, indent = 2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,12 @@
+import time
+rerun_start = time.perf_counter()
+
 import streamlit as st
-from dice_probability.visualization import display_analysis
+from dice_probability.visualization import (display_analysis, plot_dice_analysis, figure_to_png,
+                                            calculate_curves, create_probability_table, apply_modifier)
 # Import your existing dice probability code
-from dice_probability.core  import d20, d4, d6, d8, Adv, disAdv, many_dice, die_probs
+from dice_probability import cache_stats, roll_pmf
+from dice_probability.lookup import load_table, lookup_roll
 st.title("DC20 Dice Probability Calculator")
 
 # Sidebar inputs
@@ -20,35 +25,54 @@ help_d8 = st.sidebar.number_input("d8", min_value=0, max_value=3, value=0)
 help_d6 = st.sidebar.number_input("d6", min_value=0, max_value=3, value=0)
 help_d4 = st.sidebar.number_input("d4", min_value=0, max_value=3, value=0)
 
+show_debug = st.sidebar.checkbox("Show debug info", value=False)
 
-# Calculate roll probabilities using your existing functions
-# Base roll with advantage/disadvantage
-if advantage > 0 and disadvantage == 0:
-    base_roll = Adv(d20, n=advantage+1)
-elif disadvantage > 0 and advantage == 0:
-    base_roll = disAdv(d20, n=disadvantage+1)
-elif advantage > disadvantage:
-    base_roll = Adv(d20, n=(advantage-disadvantage)+1)
-elif disadvantage > advantage:
-    base_roll = disAdv(d20, n=(disadvantage-advantage)+1)
-else:
-    base_roll = d20.copy()
+# Advantage and disadvantage cancel each other out, so only the net advantage
+# matters. Together with the help dice that is the normalized roll configuration
+# all the cached results below are keyed on. The modifier is left out on purpose:
+# it only shifts the distribution, so changing it never recomputes the dice.
+net_advantage = advantage - disadvantage
 
-# Add help dice
-dice_to_roll = [base_roll]
-if help_d8 > 0:
-    dice_to_roll.extend([d8] * help_d8)
-if help_d6 > 0:
-    dice_to_roll.extend([d6] * help_d6)
-if help_d4 > 0:
-    dice_to_roll.extend([d4] * help_d4)
 
-# Calculate combined probabilities
-if len(dice_to_roll) > 1:
-    roll_result = many_dice(*dice_to_roll)
-    probabilities = die_probs(roll_result[0])
-else:
-    probabilities = die_probs(base_roll)
+def roll_expression(net_advantage, help_d8, help_d6, help_d4):
+    # Only needed for rolls that aren't in the precomputed table
+    # Base roll with advantage/disadvantage, followed by the help dice
+    expression = "d20"
+    if net_advantage > 0:
+        expression += f" adv{net_advantage}"
+    elif net_advantage < 0:
+        expression += f" dis{-net_advantage}"
+
+    for count, sides in ((help_d8, 8), (help_d6, 6), (help_d4, 4)):
+        if count > 0:
+            expression += f" + {count}d{sides}"
+    return expression
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def roll_probabilities(net_advantage, help_d8, help_d6, help_d4):
+    # All the rolls the sidebar allows are in the precomputed table,
+    # anything else is calculated from the compiled dice expression
+    if (net_advantage, help_d8, help_d6, help_d4) in load_table()[1]:
+        return lookup_roll(net_advantage, help_d8, help_d6, help_d4)
+    return roll_pmf(roll_expression(net_advantage, help_d8, help_d6, help_d4))
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def analysis_image(net_advantage, help_d8, help_d6, help_d4, modifier, title):
+    # The figure is rendered to a PNG once per configuration and modifier
+    probabilities = roll_probabilities(net_advantage, help_d8, help_d6, help_d4)
+    fig, _, _ = plot_dice_analysis(probabilities, title, modifier)
+    return figure_to_png(fig)
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def analysis_table(net_advantage, help_d8, help_d6, help_d4, modifier):
+    probabilities = roll_probabilities(net_advantage, help_d8, help_d6, help_d4)
+    return create_probability_table(*calculate_curves(apply_modifier(probabilities, modifier)))
+
+
+probabilities = roll_probabilities(net_advantage, help_d8, help_d6, help_d4)
 
 # Create a description of the roll
 roll_description = "d20"
@@ -77,9 +101,26 @@ if help_dice_text:
 if modifier != 0:
     roll_description += f" {'+' if modifier > 0 else ''}{modifier}"
 
+title = f"DC20 Roll: {roll_description}"
+
 # Display the improved visualization with table
 display_analysis(
     probabilities,
-    title=f"DC20 Roll: {roll_description}",
-    modifier=modifier
-)
\ No newline at end of file
+    title=title,
+    modifier=modifier,
+    image=analysis_image(net_advantage, help_d8, help_d6, help_d4, modifier, title),
+    table=analysis_table(net_advantage, help_d8, help_d6, help_d4, modifier)
+)
+
+# Optional debug panel with the time this rerun took
+rerun_ms = (time.perf_counter() - rerun_start) * 1000
+timings = st.session_state.setdefault("rerun_timings", [])
+timings.append(rerun_ms)
+del timings[:-20]
+
+if show_debug:
+    with st.sidebar.expander("Debug", expanded=True):
+        st.write(f"This rerun: {rerun_ms:.1f} ms")
+        st.write(f"Last {len(timings)} reruns: "
+                 f"min {min(timings):.1f} ms, max {max(timings):.1f} ms")
+        st.write("Distribution cache:", cache_stats())
@@ -5,10 +5,48 @@ from .core import (
     create_die, d4, d6, d8, d10, d12, d20,
     
     # Core functions
-    die_probs, many_dice, Adv, disAdv, check,
+    die_probs, many_dice, Adv, disAdv, keep_highest, keep_lowest, check,
     
     # Damage calculation
     damage_per_outcome, attack_outcomes, average_atk_damage
 )
 
+from .distribution import Distribution
+from .cache import cache_stats, clear_cache, set_cache_enabled
+from .instrument import profile
+
+# The rest is imported the first time it is used, so that importing the package
+# only loads the core engine (parallel alone pulls in multiprocessing)
+_LAZY = {
+    'attack_sweep': 'sweep',
+    'compile_expression': 'expression',
+    'roll_pmf': 'expression',
+    'Scenario': 'scenario',
+    'evaluate': 'scenario',
+    'turn_damage': 'turn',
+    'rounds_to_kill': 'encounter',
+    'run_scenarios': 'parallel',
+    'DicePool': 'pool',
+    'solve': 'solver',
+}
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{_LAZY[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+# Keeps `from dice_probability import *` exporting the lazy names too
+__all__ = [
+    'create_die', 'd4', 'd6', 'd8', 'd10', 'd12', 'd20',
+    'die_probs', 'many_dice', 'Adv', 'disAdv', 'keep_highest', 'keep_lowest', 'check',
+    'damage_per_outcome', 'attack_outcomes', 'average_atk_damage',
+    'Distribution', 'cache_stats', 'clear_cache', 'set_cache_enabled', 'profile',
+] + list(_LAZY)
+
 __version__ = '0.1.0'
\ No newline at end of file
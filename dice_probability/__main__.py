@@ -0,0 +1,5 @@
+'''Lets the batch command line run with: python -m dice_probability'''
+
+from .cli import main
+
+main()
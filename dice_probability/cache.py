@@ -0,0 +1,131 @@
+'''
+A process wide cache for distributions that were already calculated.
+
+The streamlit app reruns everything on every click, so the same dice pools get
+calculated over and over. The functions in core.py look up their result here first.
+Results are stored as FrozenDistribution objects so nobody can change a cached
+result by accident, the functions in core.py hand out fresh dictionaries instead.
+'''
+
+import threading
+from collections import OrderedDict
+
+
+class FrozenDistribution:
+    '''
+    An immutable set of occurences or probabilities, stored as a tuple of (roll, value) pairs.
+    '''
+    __slots__ = ('pairs',)
+
+    def __init__(self, die):
+        object.__setattr__(self, 'pairs', tuple(die.items()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FrozenDistribution is immutable')
+
+    def __eq__(self, other):
+        return isinstance(other, FrozenDistribution) and self.pairs == other.pairs
+
+    def __hash__(self):
+        return hash(self.pairs)
+
+    def __repr__(self):
+        return f'FrozenDistribution({dict(self.pairs)})'
+
+    def to_dict(self):
+        return dict(self.pairs)
+
+
+class DistributionCache:
+    '''
+    A least recently used cache with a maximum number of entries.
+    Keeps track of the number of hits and misses.
+    '''
+
+    def __init__(self, maxsize = 512):
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        '''
+        Returns the cached value for key, or calls compute() and stores its result.
+        When the cache is turned off compute() is always called.
+        '''
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'size': len(self._entries),
+                    'maxsize': self.maxsize,
+                    'enabled': self.enabled}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+#The cache shared by everything in this process
+distribution_cache = DistributionCache()
+
+
+def die_key(die):
+    '''A hashable description of a single die, keeping the order of the rolls.'''
+    return tuple(die.items())
+
+
+def pool_key(dice, with_crit = False):
+    '''
+    A hashable description of a pool of dice. The order of the dice doesn't
+    matter for the sum, so the dice are sorted. With crits the first die
+    decides the crits, so that one stays in front.
+    '''
+    keys = [die_key(die) for die in dice]
+    if with_crit:
+        return (keys[0],) + tuple(sorted(keys[1:])), True
+    return tuple(sorted(keys)), False
+
+
+def set_cache_enabled(enabled = True):
+    '''Turns the distribution cache on or off. Turning it off also empties it.'''
+    distribution_cache.enabled = enabled
+    if not enabled:
+        distribution_cache.clear()
+
+
+def cache_stats():
+    '''Returns the number of hits, misses and stored entries of the distribution cache.'''
+    return distribution_cache.stats()
+
+
+def clear_cache():
+    '''Empties the distribution cache and resets the hit and miss counters.'''
+    distribution_cache.clear()
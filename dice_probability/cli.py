@@ -0,0 +1,210 @@
+'''
+Command line batch runs, without Streamlit.
+
+Reads scenarios from JSON, YAML or CSV files, evaluates them and writes one result row
+per scenario (see stream.scenario_row) to a CSV, Parquet or Arrow file:
+
+    python -m dice_probability scenarios.yaml -o results.csv
+
+A scenario has the fields of a Scenario: base (20 or "d20"), advantage, help_dice
+([8, 6] or "d8 d6"), mod and attack (a dictionary with attack_outcomes keyword
+arguments). The attack arguments can also be given next to the other fields, which is
+how CSV files list them: one column per field.
+
+JSON and YAML files hold a list of scenarios, or a mapping with a list of "scenarios"
+and optional "defaults" that every scenario starts from.
+
+Identical scenarios are only evaluated once, and the unique ones are sorted by dice pool
+before they are cut into chunks, so every pool is calculated once per worker and the
+distribution cache does the rest. Progress and throughput go to stderr.
+'''
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from .parallel import iter_results
+from .scenario import ATTACK_DEFAULTS, Scenario
+from .stream import FORMATS, scenario_row, write_results
+
+SCENARIO_FIELDS = ('base', 'advantage', 'help_dice', 'mod')
+
+TRUE = ('true', 'yes', 'y', '1')
+FALSE = ('false', 'no', 'n', '0', '')
+
+
+def _die_size(value):
+    #20, '20' and 'd20' are all a d20
+    value = str(value).strip().lower()
+    return int(value[1:] if value.startswith('d') else value)
+
+
+def _attack_value(name, value):
+    #Turns a value into the type of its default, so every scenario gives the same column types.
+    #CSV gives everything as text, JSON and YAML can use 1 for true or 2.0 for 2
+    default = ATTACK_DEFAULTS[name]
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            if value.strip().lower() in TRUE:
+                return True
+            if value.strip().lower() in FALSE:
+                return False
+        elif isinstance(value, (bool, int, float)):
+            return bool(value)
+        raise ValueError(f'{name} should be true or false, not {value!r}')
+
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f'{name} should be a number, not {value!r}')
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f'{name} should be a number, not {value!r}')
+    return int(number) if number.is_integer() and name != 'type_multiplier' else number
+
+
+def parse_scenario(fields, defaults = None):
+    '''Turns a dictionary from a scenario file into a Scenario.'''
+    defaults = dict(defaults or {})
+    fields = {name: value for name, value in fields.items() if value not in (None, '')}
+
+    #The attack arguments of the defaults and the scenario are merged, not replaced
+    attack = dict(defaults.pop('attack', None) or {})
+    attack.update(fields.pop('attack', None) or {})
+    fields = {**defaults, **fields}
+    attack.update({name: fields.pop(name) for name in list(fields) if name in ATTACK_DEFAULTS})
+
+    unknown = set(fields) - set(SCENARIO_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown scenario fields: {', '.join(sorted(unknown))}")
+
+    help_dice = fields.get('help_dice', ())
+    if isinstance(help_dice, str):
+        help_dice = help_dice.replace(',', ' ').split()
+    elif isinstance(help_dice, (int, float)):
+        help_dice = [help_dice]
+
+    return Scenario(int(float(fields.get('advantage', 0))),
+                    [_die_size(sides) for sides in help_dice],
+                    int(float(fields.get('mod', 0))),
+                    {name: _attack_value(name, value) for name, value in attack.items()},
+                    _die_size(fields.get('base', 20)))
+
+
+def load_scenarios(path):
+    '''Reads the scenarios from a .json, .yaml/.yml or .csv file.'''
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline = '') as file:
+        if extension == '.csv':
+            return [parse_scenario(row) for row in csv.DictReader(file)]
+        if extension == '.json':
+            data = json.load(file)
+        elif extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError as error:
+                raise ImportError('Reading YAML files needs PyYAML, install it with pip install pyyaml') from error
+            data = yaml.safe_load(file)
+        else:
+            raise ValueError(f"Can't read scenarios from {path}, use a .json, .yaml or .csv file")
+
+    defaults = None
+    if isinstance(data, dict):
+        defaults = data.get('defaults')
+        data = data.get('scenarios', [])
+    return [parse_scenario(fields, defaults) for fields in data]
+
+
+class Progress:
+    '''Prints the number of evaluated scenarios and the throughput to stderr, at most a few times a second.'''
+
+    def __init__(self, total, quiet = False, interval = 0.25):
+        self.total = total
+        self.quiet = quiet
+        self.interval = interval
+        self.done = 0
+        self.start = self.last = time.perf_counter()
+
+    @property
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.start, 1e-9)
+
+    def update(self, count = 1):
+        self.done += count
+        now = time.perf_counter()
+        if not self.quiet and (now - self.last >= self.interval or self.done == self.total):
+            self.last = now
+            print(f'\r{self.done}/{self.total} scenarios, {self.rate:.0f}/s', end = '', file = sys.stderr, flush = True)
+
+    def close(self):
+        if not self.quiet:
+            print(file = sys.stderr)
+
+
+def output_format(path):
+    '''The format of a result file from its extension, raises ValueError for an unknown one.'''
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Can't tell the file format of {path}, use one of: {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+
+def run(scenarios, output, workers = 1, chunksize = 1000, with_pmf = False, quiet = False):
+    '''
+    Evaluates scenarios, deduplicated and sorted by pool, and writes the results to output
+    in the order of the scenarios. Returns a dictionary with counts and timings.
+    '''
+    file_format = output_format(output)
+    start = time.perf_counter()
+    unique = sorted(set(scenarios), key = lambda scenario: (scenario.pool(), scenario))
+
+    progress = Progress(len(unique), quiet)
+    results = {}
+    for scenario, result in iter_results(unique, workers = workers, chunksize = chunksize):
+        results[scenario] = result
+        progress.update()
+    progress.close()
+    evaluated = time.perf_counter()
+
+    rows = (scenario_row(scenario, results[scenario], with_pmf = with_pmf) for scenario in scenarios)
+    count = write_results(rows, output, file_format = file_format)
+
+    return {'scenarios': count,
+            'unique': len(unique),
+            'pools': len({scenario.pool() for scenario in unique}),
+            'seconds': time.perf_counter() - start,
+            'evaluate_seconds': evaluated - start,
+            'rate': len(unique) / max(evaluated - start, 1e-9)}
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(prog = 'python -m dice_probability',
+                                     description = 'Evaluate scenario files in bulk and write the results.')
+    parser.add_argument('inputs', nargs = '+', help = 'scenario files (.json, .yaml, .yml or .csv)')
+    parser.add_argument('-o', '--output', required = True,
+                        help = f"result file, the format comes from the extension ({', '.join(FORMATS)})")
+    parser.add_argument('-w', '--workers', type = int, default = 1, help = 'worker processes (default 1)')
+    parser.add_argument('--chunksize', type = int, default = 1000, help = 'scenarios per chunk')
+    parser.add_argument('--with-pmf', action = 'store_true', help = 'also write the damage pmf of every scenario')
+    parser.add_argument('-q', '--quiet', action = 'store_true', help = "don't print progress")
+    args = parser.parse_args(argv)
+
+    try:
+        #Check the output before spending time on the scenarios
+        output_format(args.output)
+        scenarios = [scenario for path in args.inputs for scenario in load_scenarios(path)]
+        stats = run(scenarios, args.output, workers = args.workers, chunksize = args.chunksize,
+                    with_pmf = args.with_pmf, quiet = args.quiet)
+    except (OSError, ValueError, ImportError) as error:
+        parser.exit(1, f'error: {error}\n')
+
+    if not args.quiet:
+        print(f"{stats['scenarios']} scenarios ({stats['unique']} unique, {stats['pools']} dice pools) "
+              f"in {stats['seconds']:.2f}s, {stats['rate']:.0f} scenarios/s, written to {args.output}",
+              file = sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
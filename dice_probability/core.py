@@ -9,6 +9,13 @@ occurences into probabilities which can then be used to do stuff like calculatin
 '''
 
 import math
+from fractions import Fraction
+
+import numpy as np
+
+from . import cache, damage, engine
+from .distribution import Distribution
+from .instrument import instrumented
 
 def create_die(sides):
     """Create a die with the specified number of sides."""
@@ -22,16 +29,34 @@ d10 = create_die(10)
 d12 = create_die(12)
 d20 = create_die(20)
 
-def die_probs(die):
+def _to_probs (die, total, precision):
+     #Divides the occurences of a single dictionary by the total number of occurences
+     if precision == 'float':
+          return {roll: occ / total for roll, occ in die.items()}
+
+     if precision == 'exact':
+          return {roll: Fraction(occ, total) for roll, occ in die.items()}
+
+     #float64 and float32 divide all the occurences at once with numpy
+     probs = (np.array(list(die.values())) / total).astype(precision)
+     return dict(zip(die, probs.tolist()))
+
+@instrumented
+def die_probs(die, precision = 'float'):
      ''' Takes the number of occurences on a die roll or a set of die rolls,
      and turns those into probabilities in the form of a probability mass function (pmf)
      This also works with lists containing dictionaries. In that case, the output is also
      A list containing the same number of dictionaries
+
+     precision decides how the probabilities are calculated: 'float' (the default) for
+     regular python floats, 'exact' for Fractions, or 'float64'/'float32' to divide
+     everything at once with numpy. float32 values are rounded to float32 precision.
      '''
+     engine.check_precision(precision)
 
      #if the dieroll or set of dierolls is given as a single dictionary, use this code
      if isinstance(die,dict):
-          pmf = {roll: occ/(sum(die.values())) for roll, occ in die.items()}
+          pmf = _to_probs(die, sum(die.values()), precision)
 
      #if the dieroll is given as a list containings a few separate dictionaries
      #(as is the case when working with crits) instead use this code
@@ -42,10 +67,11 @@ def die_probs(die):
           for die_dict in die:
                die_total += sum(die_dict.values())
 
-          pmf = [{roll: occ / die_total for roll, occ in sub_die.items()}for sub_die in die]
+          pmf = [_to_probs(sub_die, die_total, precision) for sub_die in die]
 
      return (pmf)
 
+@instrumented
 def many_dice (*dice, with_crit = False):
 
      ''' Calculates the number of occurences of each outcome as
@@ -53,108 +79,68 @@ def many_dice (*dice, with_crit = False):
      always returns a list containing a dictionary. If with_crit is set to true, it instead
      returns a list with three dictionaries. One with the regular rolls, one with the crit fails
      and one with the crit hits. The crits are based on the first die in the input.
+
+     The actual adding of the dice happens on arrays in engine.py. Results are kept in the
+     distribution cache (see cache.py), so asking for the same pool twice is just a lookup.
      '''
 
+     #This code ensures that if a tuple is entered as variable, we don't convert the nested tuple
+     #Into a regular tuple. The nested tuple happened when calling many_dice through other functions
      if isinstance (dice[0],tuple):
                dice = dice[0]
 
-     if not with_crit:
-     #This code ensures that if a tuple is entered as variable, we don't convert the nested tuple
-     #Into a regular tuple. The nested tuple happened when calling many_dice through other functions
-          
-              
-          outcome = {}
-
-          #we add the dice to the outcome one by one
-          for die in dice:
-             
-             if outcome:
-                 temp_outcome = {}
-                 
-                 for die_roll, die_occ in die.items():
-
-                     #each new roll is determined by the sum of a roll we already had stored and the current
-                     #die roll. The number of occurences is the product of our stored occurence and the
-                     #current die rolls occurences. Several combinations can contribute to the same new roll
-                     for outcome_roll, outcome_occ in outcome.items():
-                         new_roll = die_roll + outcome_roll
-                         new_occ = outcome_occ * die_occ
-
-                         if new_roll in temp_outcome:
-                             temp_outcome[new_roll] += new_occ
-
-                         else:
-                             temp_outcome[new_roll] = new_occ
-                             
-                 outcome = temp_outcome
-                 
-             else:
-                 outcome = die
-             
-          return ([outcome])
+     key = ('many_dice',) + cache.pool_key(dice, with_crit)
+     outcomes = cache.distribution_cache.get(
+          key, lambda: tuple(cache.FrozenDistribution(outcome) for outcome in _sum_dice(dice, with_crit)))
 
+     return ([outcome.to_dict() for outcome in outcomes])
 
+
+def _sum_dice (dice, with_crit):
+     #Adds the dice up as Distribution objects and converts them back to dictionaries.
+     #With crits, the first die is split into regular rolls, crit fails and crit hits,
+     #and every other die gets added to each of those three separately
      if with_crit:
+          outcome = Distribution.from_dict(dice[0], with_crit = True)
+          rest = dice[1:]
+     else:
+          outcome = None
+          rest = dice
 
- 
-          outcomes = [{},{},{}]
-          
-          #we add the dice to the outcome one by one
+     #Identical dice are grouped, so k copies of a die only need about log2(k)
+     #convolutions through repeated squaring instead of k
+     groups = {}
+     for die in rest:
+          groups.setdefault(cache.die_key(die), [die, 0])[1] += 1
 
-         
-          for die in dice:
-                       
-               if outcomes[0]:
-                    temp_outcomes = [{},{},{}]
-                      
-                    for die_roll, die_occ in die.items():
-                         for i, outcome in enumerate(outcomes):
-                              #print(outcome)
-                              
-                              #each new roll is determined by the sum of a roll we already had stored and the current
-                              #die roll. The number of occurences is the product of our stored occurence and the
-                              #current die rolls occurences. Several combinations can contribute to the same new roll
-                              
-                              for outcome_roll, outcome_occ in outcome.items():
-                                   #print(outcome_roll)
-                                   new_roll = die_roll + outcome_roll
-                                   #print(new_roll)
-                                   new_occ = outcome_occ * die_occ
-                                   #print('is', new_roll, 'in: ', temp_outcomes[0], '?')
-                              
-                                   if new_roll in temp_outcomes[i]:
-                                       temp_outcomes[i][new_roll] += new_occ
-                                       #print(temp_outcomes[0][new_roll])
-
-                                   else:
-                                       temp_outcomes[i][new_roll] = new_occ
-                                       #print(temp_outcomes[0])
-                                  
-                    outcomes = temp_outcomes
-                                     
-               else:
-                 outcomes[0] = dict(list(die.items())[1:-1])
-                 outcomes[1] = dict(list(die.items())[:1])
-                 outcomes[2] = dict(list(die.items())[-1:])
-                 
-##          #testcode to make sure that when you combine all the crit values,
-##          #you get back to the same result as the non-crit values
-##          combined = {}
-##          for outcome in outcomes:
-##               if combined:
-##                    for roll, occ in outcome.items():
-##                         if roll in combined:
-##                              combined[roll] += occ
-##                         else:
-##                              combined[roll] = occ
-##               else:
-##                    combined = outcome
-##
-##          combined_sorted = {key: val for key, val in sorted(combined.items())}     
-##          print (combined_sorted)
-             
-          return (outcomes)
+     for die, copies in groups.values():
+          part = Distribution.from_dict(die).times(copies)
+          outcome = part if outcome is None else outcome + part
+
+     return (outcome.to_dicts())
+
+
+def keep_highest (die = d20, n = 2, k = 1):
+    '''
+    Calculates the number of occurences of each possible outcome when rolling n
+    dice and adding up the k highest values. The die can be any occurence dictionary,
+    so help dice or dice that are already combined work as well.
+    4d6 drop lowest is keep_highest(d6, n = 4, k = 3)
+    '''
+    key = ('keep_highest', cache.die_key(die), n, k)
+    occs = cache.distribution_cache.get(
+        key, lambda: cache.FrozenDistribution(engine.from_array(*engine.keep_highest(engine.to_array(die), n, k))))
+    return (occs.to_dict())
 
+def keep_lowest (die = d20, n = 2, k = 1):
+    '''
+    Calculates the number of occurences of each possible outcome when rolling n
+    dice and adding up the k lowest values. The die can be any occurence dictionary.
+    '''
+    key = ('keep_lowest', cache.die_key(die), n, k)
+    occs = cache.distribution_cache.get(
+        key, lambda: cache.FrozenDistribution(engine.from_array(*engine.keep_lowest(engine.to_array(die), n, k))))
+    return (occs.to_dict())
 
 def Adv (die = d20, n = 2) :
     '''
@@ -162,41 +148,27 @@ def Adv (die = d20, n = 2) :
     dice and keeping the highest value
     Takes an argument die for die size, and an argument n for number of dice
     '''
-    #Calculate the probabilities of the complementary cumulative distribution function (com cdf).
-    #I then turn this into the probability mass function (pmf)
-    #There might be other ways but I just know the mathematical formula for this
-    #one which means I don't need to use nested loops
-    com_cdf = {roll: (roll / len(die)) ** n for roll in die} 
-    pmf = {}
-    
-    for roll, prob in com_cdf.items():
-        if roll == 1:
-            pmf[roll] = prob
-        else:
-            pmf[roll] = prob - com_cdf[roll - 1]
-
-    #turn the calculated probabilities into occurences, since occurences make it much easier
-    #to do further calculations with dice rolls
-    occs = {key: int(round(value * len(die)**n)) for key, value in pmf.items()}
-    return (occs)
+    #The number of occurences of rolling at most x on n dice is cdf(x) ** n.
+    #Taking the difference between neighbouring rolls gives the occurences of each roll.
+    #This is all done with integers so it stays exact, even for a lot of dice
+    return (keep_highest(die, n))
 
 def disAdv(die = d20, n = 2):
     '''
     Calculates the number of occurences of each possible outcome when rolling a number of
     dice and keeping the lowest value.
     Takes an argument die for die size, and an argument n for number of dice.
-    This function works by simply inverting the Adv() function
     '''
-    occs = {len(die) + 1 - key: value for key, value in Adv(die, n).items()}
-    
-    sorted_occs = {key: val for key, val in sorted(occs.items())} 
-    
-    return (sorted_occs)    
+    return (keep_lowest(die, n))
     
 
-def check (*dice, mod = 0, with_crit = True):
+@instrumented
+def check (*dice, mod = 0, with_crit = True, precision = 'float'):
      '''
      Adds a modifier to the rolls, resulting in a pmf for a full on ability/attack/spell check
+     The pmf without the modifier is kept in the distribution cache, so only the
+     modifier has to be added when the same dice are checked again
+     precision works the same as in die_probs
      '''
      #This code ensures that if a tuple is entered as variable, we don't convert the nested tuple
      #Into a regular tuple. The nested tuple happened when calling check through other functions
@@ -204,12 +176,15 @@ def check (*dice, mod = 0, with_crit = True):
           dice = dice[0]
          
      
-     dice_occs = many_dice(dice, with_crit = with_crit)
-     unmod_pmf = die_probs(dice_occs)
+     key = ('check', precision) + cache.pool_key(dice, with_crit)
+     unmod_pmf = cache.distribution_cache.get(
+          key, lambda: tuple(cache.FrozenDistribution(sub_pmf)
+                             for sub_pmf in die_probs(many_dice(dice, with_crit = with_crit),
+                                                      precision = precision)))
      #print(unmod_pmf)
      pmf = [{},{},{}]
      for i, sub_pmf in enumerate(unmod_pmf):
-          pmf[i] = {key+ mod : value  for key, value in sub_pmf.items()}
+          pmf[i] = {key+ mod : value  for key, value in sub_pmf.pairs}
      
 
 ##     if with_crit :
@@ -220,6 +195,7 @@ def check (*dice, mod = 0, with_crit = True):
      return (pmf)
 
 
+@instrumented
 def damage_per_outcome(
      base_damage = 1,
      bonus_damage = 0,
@@ -289,6 +265,7 @@ def damage_per_outcome(
 
 
 
+@instrumented
 def attack_outcomes (*dice,
                      mod = 0,
                      defense = 10,
@@ -300,83 +277,35 @@ def attack_outcomes (*dice,
                      type_multiplier = 1,
                      type_adder = 0,
                      gwf = False, #2 on brutal or critical
-                     brutal_strikes = False #1 on brutal
+                     brutal_strikes = False, #1 on brutal
+                     precision = 'float'
                      ):
+     '''
+     Calculates the pmf of the damage of an attack.
+     With the default precision the probabilities are rounded to 4 decimals. 'exact' gives
+     unrounded Fractions, 'float64' and 'float32' give unrounded floats for bulk work.
+     '''
 
      if isinstance (dice[0],tuple):
           dice = dice[0]
      
-     normals, fumbles ,crits = check(dice, mod = mod, with_crit = True)
-
-     
-
-     damage_on_roll_normal = damage_per_outcome(crit = False,
-                                                fumble = False,
-                                                rolls = normals,
-                                                defense = defense,
-                                                base_damage = base_damage,
-                                                bonus_damage = bonus_damage,
-                                                impact = impact,
-                                                dr = dr, 
-                                                bonus_reduction = bonus_reduction,
-                                                type_multiplier = type_multiplier,
-                                                type_adder = type_adder,
-                                                gwf = gwf, 
-                                                brutal_strikes = brutal_strikes 
-                                                )
-     
-     damage_on_roll_fumble = damage_per_outcome(crit = False,
-                                                fumble = True,
-                                                rolls = fumbles,
-                                                defense = defense,
-                                                base_damage = base_damage,
-                                                bonus_damage = bonus_damage,
-                                                impact = impact,
-                                                dr = dr, 
-                                                bonus_reduction = bonus_reduction,
-                                                type_multiplier = type_multiplier,
-                                                type_adder = type_adder,
-                                                gwf = gwf, 
-                                                brutal_strikes = brutal_strikes 
-                                              )
-
-     damage_on_roll_crit = damage_per_outcome(crit = True,
-                                              fumble = False,
-                                              rolls = crits,
-                                              defense = defense,
-                                              base_damage = base_damage,
-                                              bonus_damage = bonus_damage,
-                                              impact = impact,
-                                              dr = dr, 
-                                              bonus_reduction = bonus_reduction,
-                                              type_multiplier = type_multiplier,
-                                              type_adder = type_adder,
-                                              gwf = gwf, 
-                                              brutal_strikes = brutal_strikes 
-                                              )
-
-     
-     
-     damage_pmf = {damage:0 for damage in list(damage_on_roll_normal.values()) +
-                   list(damage_on_roll_crit.values()) + list(damage_on_roll_fumble.values())
-                   }
-     for dmg_key, dmg_value in damage_on_roll_normal.items():
-          for hit_key, hit_value in normals.items():
-               if dmg_key == hit_key:
-                    damage_pmf[dmg_value] += hit_value
-     for dmg_key, dmg_value in damage_on_roll_crit.items():
-          for hit_key, hit_value in crits.items():
-               if dmg_key == hit_key:
-                    damage_pmf[dmg_value] += hit_value
-     for dmg_key, dmg_value in damage_on_roll_fumble.items():
-          for hit_key, hit_value in fumbles.items():
-               if dmg_key == hit_key:
-                    damage_pmf[dmg_value] += hit_value
-          
-
-     #damage_on_roll_normal = damage_per_outcome(crit = True,to_hit = crits)
-
-     damage_pmf = {key: round(value, 4) for key, value in damage_pmf.items()}
+     normals, fumbles ,crits = check(dice, mod = mod, with_crit = True, precision = precision)
+
+     #The damage of every roll is worked out in one go on numpy arrays, and then
+     #added up per damage value (see damage.py)
+     damage_pmf = damage.damage_pmf(normals, fumbles, crits,
+                                    defense = defense,
+                                    base_damage = base_damage,
+                                    bonus_damage = bonus_damage,
+                                    impact = impact,
+                                    dr = dr, 
+                                    bonus_reduction = bonus_reduction,
+                                    type_multiplier = type_multiplier,
+                                    type_adder = type_adder,
+                                    gwf = gwf, 
+                                    brutal_strikes = brutal_strikes,
+                                    precision = precision
+                                    )
          
      return (damage_pmf)
     
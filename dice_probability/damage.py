@@ -0,0 +1,128 @@
+'''
+Vectorized damage calculations.
+
+damage_per_outcome in core.py works out the damage one roll at a time. The functions here
+do the same thing for a whole numpy array of rolls at once (and damage_matrix for a whole array
+of defenses too), and turn the three pmfs from check() (regular rolls, fumbles and crits)
+into a damage pmf in a single pass.
+'''
+
+from fractions import Fraction
+
+import numpy as np
+
+from .instrument import instrumented
+
+
+@instrumented
+def damage_on_rolls(rolls,
+                    crit = False,
+                    fumble = False,
+                    defense = 10,
+                    base_damage = 1,
+                    bonus_damage = 0,
+                    impact = False, #1 on heavy
+                    dr = 0, #bypassed by heavy or critical
+                    bonus_reduction = 0,
+                    type_multiplier = 1,
+                    type_adder = 0,
+                    gwf = False, #2 on brutal or critical
+                    brutal_strikes = False #1 on brutal
+                    ):
+    '''
+    Damage for every roll in an array, using the same rules as damage_per_outcome.
+    crit and fumble can be a single bool or a bool array with one entry per roll.
+    Returns an int64 array with the damage per roll.
+    '''
+    rolls = np.asarray(rolls, dtype = np.int64)
+    crit = np.asarray(crit, dtype = bool)
+    fumble = np.asarray(fumble, dtype = bool)
+
+    #Every 5 above the defense is a step up: 1 step is a heavy hit, 2 steps a brutal hit
+    by_fives_damage = np.maximum((rolls - defense) // 5, 0)
+    heavy = by_fives_damage >= 1
+    brutal = by_fives_damage >= 2
+
+    crit_dmg = np.where(crit, 2, 0)
+    impact_dmg = np.where(heavy, 1, 0) if impact else 0
+    gwf_dmg = np.where(crit | brutal, 2, 0) if gwf else 0
+    brutal_strikes_dmg = np.where(brutal, 2, 0) if brutal_strikes else 0
+
+    #dr is bypassed by heavy hits and crits
+    dr_reduction = np.where(crit | heavy, 0, dr)
+
+    damage = base_damage + bonus_damage + crit_dmg + impact_dmg + gwf_dmg + brutal_strikes_dmg + by_fives_damage
+    reduction = dr_reduction + bonus_reduction
+
+    pre_total = np.maximum(damage - reduction, 0)
+    total = np.ceil((pre_total + type_adder) * type_multiplier).astype(np.int64)
+
+    #A miss or a fumble always results in no damage
+    hit = (crit | (rolls >= defense)) & ~fumble
+
+    return np.where(hit, total, 0)
+
+
+@instrumented
+def damage_matrix(rolls = range(1, 21), defenses = (10,), crit = False, fumble = False, **attack):
+    '''
+    The damage of every roll against every defense in one pass, with the same rules and
+    defaults as damage_per_outcome: row i, column j is the damage of rolls[j] against defenses[i].
+    crit and fumble can be a single bool or a bool array with one entry per roll.
+    The other keyword arguments are those of damage_on_rolls, except defense.
+    Returns an int64 array of shape (len(defenses), len(rolls)).
+    '''
+    rolls = np.atleast_1d(np.asarray(rolls, dtype = np.int64))
+    defenses = np.atleast_1d(np.asarray(defenses))
+
+    #Rolls (and their crit/fumble flags) go along the columns and defenses along the rows,
+    #broadcasting does the rest
+    return damage_on_rolls(rolls, crit = crit, fumble = fumble, defense = defenses[:, None], **attack)
+
+
+def flatten_check(normals, fumbles, crits):
+    '''
+    Flattens the three pmfs returned by check() into arrays of rolls, probabilities
+    and crit/fumble flags. The regular rolls come first, then the crits, then the fumbles.
+    Exact pmfs (Fractions) give an object array of probabilities.
+    '''
+    sub_pmfs = (normals, crits, fumbles)
+    sizes = [len(sub_pmf) for sub_pmf in sub_pmfs]
+
+    rolls = np.fromiter((roll for sub_pmf in sub_pmfs for roll in sub_pmf), dtype = np.int64)
+    probs = [prob for sub_pmf in sub_pmfs for prob in sub_pmf.values()]
+    probs = np.array(probs, dtype = object if any(isinstance(prob, Fraction) for prob in probs) else np.float64)
+    crit = np.repeat([False, True, False], sizes)
+    fumble = np.repeat([False, False, True], sizes)
+
+    return rolls, probs, crit, fumble
+
+
+@instrumented
+def damage_pmf(normals, fumbles, crits, precision = 'float', **attack):
+    '''
+    Turns the three pmfs returned by check() into a pmf of the damage dealt.
+    The keyword arguments are passed on to damage_on_rolls().
+    With the default precision the probabilities are rounded to 4 decimals, like
+    attack_outcomes always did. 'exact' adds up Fractions, 'float64' and 'float32'
+    return the unrounded sums.
+    '''
+    rolls, probs, crit, fumble = flatten_check(normals, fumbles, crits)
+
+    damage = damage_on_rolls(rolls, crit = crit, fumble = fumble, **attack)
+
+    #bincount adds the probabilities up in the order of the rolls, so the result is exactly the
+    #same as adding them one by one. The damage values are kept in the order they first show up
+    values, first, index = np.unique(damage, return_index = True, return_inverse = True)
+    order = np.argsort(first, kind = 'stable')
+
+    if precision == 'exact':
+        totals = [Fraction(0)] * len(values)
+        for i, prob in zip(index.tolist(), probs.tolist()):
+            totals[i] += Fraction(prob)
+        return {value: totals[i] for value, i in zip(values[order].tolist(), order.tolist())}
+
+    totals = np.bincount(index, weights = probs.astype(np.float64), minlength = len(values))[order]
+    if precision == 'float':
+        return {value: round(total, 4) for value, total in zip(values[order].tolist(), totals.tolist())}
+    return dict(zip(values[order].tolist(), totals.astype(precision).tolist()))
@@ -0,0 +1,192 @@
+'''
+A compact replacement for the occurence dictionaries.
+
+A Distribution stores the lowest roll (offset) and a numpy vector with the number of
+occurences of every roll from there on. When it is split for crits, the vector becomes
+three rows: regular rolls, crit fails and crit hits, in the same order as many_dice returns them.
+All the heavy lifting is done by the functions in engine.py.
+'''
+
+from fractions import Fraction
+
+import numpy as np
+
+from . import engine
+
+
+class Distribution:
+    '''
+    Occurences of the rolls of one die or a combination of dice.
+
+    Adding two distributions adds the dice together, adding an int adds a modifier.
+    highest() and lowest() roll several copies and keep the highest or lowest dice.
+    '''
+    __slots__ = ('offset', 'counts')
+
+    def __init__(self, offset, counts):
+        self.offset = int(offset)
+        self.counts = counts
+
+    @classmethod
+    def from_dict(cls, die, with_crit = False):
+        '''
+        Builds a distribution from an occurence dictionary. With with_crit set to true
+        the first entry of the dictionary is the crit fail and the last one the crit hit,
+        like in many_dice.
+        '''
+        if with_crit:
+            return cls._from_channels(engine.split_crit(die))
+        return cls(*engine.to_array(die))
+
+    @classmethod
+    def die(cls, sides):
+        '''A single die with the given number of sides.'''
+        return cls(1, np.ones(sides, dtype = np.int64))
+
+    @classmethod
+    def _from_channels(cls, channels):
+        #Puts three (offset, counts) pairs on a shared offset, one row each
+        filled = [(offset, counts) for offset, counts in channels if len(counts)]
+        if not filled:
+            return cls(0, np.zeros((len(channels), 0), dtype = np.int64))
+        low = min(offset for offset, _ in filled)
+        high = max(offset + len(counts) for offset, counts in filled)
+        dtype = object if any(counts.dtype == object for _, counts in filled) else np.result_type(*(counts for _, counts in filled))
+
+        rows = np.zeros((len(channels), high - low), dtype = dtype)
+        for row, (offset, counts) in zip(rows, channels):
+            row[offset - low:offset - low + len(counts)] = counts
+        return cls(low, rows)
+
+    @property
+    def split(self):
+        '''True if the distribution keeps regular rolls, crit fails and crit hits apart.'''
+        return self.counts.ndim == 2
+
+    @property
+    def combined(self):
+        '''The occurences of every roll, with the crit channels added together.'''
+        return self.counts.sum(axis = 0) if self.split else self.counts
+
+    @property
+    def rolls(self):
+        return np.arange(self.offset, self.offset + self.counts.shape[-1])
+
+    @property
+    def total(self):
+        '''Total number of occurences as a python int.'''
+        return engine.total(self.combined)
+
+    @property
+    def nbytes(self):
+        '''Memory used by the count vector, python ints in object arrays included.'''
+        if self.counts.dtype == object:
+            return self.counts.nbytes + sum(occ.__sizeof__() for occ in self.counts.ravel().tolist())
+        return self.counts.nbytes
+
+    def __len__(self):
+        return self.counts.shape[-1]
+
+    def __repr__(self):
+        return f'Distribution({self.to_dicts() if self.split else self.to_dict()})'
+
+    def __eq__(self, other):
+        return (isinstance(other, Distribution) and self.split == other.split
+                and self.to_dicts() == other.to_dicts())
+
+    __hash__ = None
+
+    def __add__(self, other):
+        if isinstance(other, Distribution):
+            if self.split and other.split:
+                raise ValueError("Can't add two distributions that are both split for crits")
+            if other.split:
+                return other + self
+            if self.split:
+                rows = [engine.convolve(row, other.counts) for row in self.counts]
+                return Distribution(self.offset + other.offset, np.vstack(rows))
+            return Distribution(self.offset + other.offset, engine.convolve(self.counts, other.counts))
+
+        if isinstance(other, (int, np.integer)):
+            return self.shift(other)
+
+        return NotImplemented
+
+    def __radd__(self, other):
+        #Lets sum() start from 0
+        if isinstance(other, (int, np.integer)):
+            return self.shift(other)
+        return NotImplemented
+
+    def __sub__(self, other):
+        if isinstance(other, (int, np.integer)):
+            return self.shift(-other)
+        return NotImplemented
+
+    def remove(self, other):
+        '''
+        Takes dice back out: returns the distribution that gives this one when other is added to it.
+        This is an exact deconvolution, so it only takes a single pass over the rolls.
+        '''
+        if other.split:
+            raise ValueError("Can't remove a distribution that is split for crits")
+        if self.split:
+            rows = [engine.deconvolve(row, other.counts) for row in self.counts]
+            return Distribution(self.offset - other.offset, np.vstack(rows))
+        return Distribution(self.offset - other.offset, engine.deconvolve(self.counts, other.counts))
+
+    def shift(self, mod):
+        '''Adds a flat modifier to every roll.'''
+        return Distribution(self.offset + int(mod), self.counts)
+
+    def times(self, n):
+        '''Adds n copies together with repeated squaring, e.g. Distribution.die(6).times(10) is 10d6.'''
+        if self.split:
+            raise ValueError("Can't add copies of a distribution that is split for crits")
+        return Distribution(*engine.power((self.offset, self.counts), n))
+
+    def with_crit(self):
+        '''Splits the lowest roll off as the crit fail and the highest roll as the crit hit.'''
+        if self.split:
+            return self
+        return Distribution.from_dict(self.to_dict(), with_crit = True)
+
+    def highest(self, n, k = 1):
+        '''Rolls n copies and adds up the k highest, e.g. d20.highest(2) is advantage.'''
+        return Distribution(*engine.keep_highest((self.offset, self.combined), n, k))
+
+    def lowest(self, n, k = 1):
+        '''Rolls n copies and adds up the k lowest, e.g. d20.lowest(2) is disadvantage.'''
+        return Distribution(*engine.keep_lowest((self.offset, self.combined), n, k))
+
+    def pmf(self, dtype = np.float64):
+        '''
+        The probabilities of every roll, as a float array (three rows when split).
+        The occurences are only divided at the end, so big integers stay exact until then.
+        '''
+        total = self.total
+        if self.counts.dtype == object:
+            return np.array([Fraction(occ, total) for occ in self.counts.ravel().tolist()],
+                            dtype = dtype).reshape(self.counts.shape)
+        return (self.counts / total).astype(dtype)
+
+    def mean(self):
+        '''The exact average roll, as a Fraction.'''
+        counts = self.combined.tolist()
+        return Fraction(sum(roll * occ for roll, occ in zip(self.rolls.tolist(), counts)), sum(counts))
+
+    def variance(self):
+        '''The exact variance of the rolls, as a Fraction.'''
+        counts = self.combined.tolist()
+        mean = self.mean()
+        return sum((roll - mean) ** 2 * occ for roll, occ in zip(self.rolls.tolist(), counts)) / sum(counts)
+
+    def to_dict(self):
+        '''The occurences as a dictionary, crit channels added together.'''
+        return engine.from_array(self.offset, self.combined)
+
+    def to_dicts(self):
+        '''The occurences as a list of dictionaries, in the same format as many_dice.'''
+        if self.split:
+            return [engine.from_array(self.offset, row) for row in self.counts]
+        return [self.to_dict()]
@@ -0,0 +1,97 @@
+'''
+How many rounds it takes to bring a target down.
+
+Instead of tracking every possible sequence of hits, we keep a probability vector with
+the total damage dealt so far, cut off at the target's HP: once the damage reaches the HP
+the target is down and that probability leaves the vector. Every round the vector is
+convolved with the damage pmf of a round, and the mass that falls off the end is the chance
+the target drops in that round. We stop as soon as the chance the target is still standing
+is below epsilon.
+
+Because the vector counts damage dealt rather than HP left, a single pass covers a whole
+batch of targets: a target with less HP is down as soon as less damage has been dealt.
+'''
+
+from collections import namedtuple
+
+import numpy as np
+
+from .turn import TurnResult, convolve_pmf, damage_array
+
+
+class KillResult(namedtuple('KillResult', ['hp', 'pmf', 'standing'])):
+    '''
+    The time to kill for a batch of targets. pmf[t, r] is the chance target t drops in
+    round r + 1, and standing[t] is the chance it is still up after the last round.
+    For a single target hp is a number and pmf is one dimensional.
+    '''
+    __slots__ = ()
+
+    @property
+    def rounds(self):
+        return np.arange(1, np.shape(self.pmf)[-1] + 1)
+
+    def cdf(self):
+        '''The chance the target is down after each round.'''
+        return np.cumsum(self.pmf, axis = -1)
+
+    def expected_rounds(self):
+        '''
+        The average number of rounds to kill. If some chance of the target standing is left,
+        that part is counted as the last round, so the result is a lower bound.
+        '''
+        rounds = self.rounds
+        return self.pmf @ rounds + self.standing * rounds[-1]
+
+
+def _round_pmf(round_damage):
+    #The damage pmf of a round as an array starting at 0 damage.
+    #Negative damage doesn't heal the target, so it counts as 0
+    if isinstance(round_damage, TurnResult):
+        offset, pmf = round_damage.offset, round_damage.pmf
+    else:
+        offset, pmf = damage_array(round_damage)
+
+    damage = np.maximum(np.arange(offset, offset + len(pmf)), 0)
+    return np.bincount(damage, weights = pmf)
+
+
+def rounds_to_kill(round_damage, hp, max_rounds = 1000, epsilon = 1e-9):
+    '''
+    The chance of bringing a target with hp hit points down in each round.
+    round_damage is the damage of a single round: a damage pmf dictionary, a TurnResult,
+    a Scenario or a ScenarioResult. It can also be a list with one of those per round,
+    the last one is used for all later rounds.
+    hp can be a single number or a list of numbers for a batch of targets.
+    Returns a KillResult.
+    '''
+    if isinstance(round_damage, list):
+        per_round = [_round_pmf(damage) for damage in round_damage]
+    else:
+        per_round = [_round_pmf(round_damage)]
+
+    hps = np.atleast_1d(np.asarray(hp, dtype = np.int64))
+    if (hps < 1).any():
+        raise ValueError('hp needs to be at least 1')
+    top = int(hps.max())
+
+    #dealt[m] is the chance that m damage has been dealt and the toughest target is still up
+    dealt = np.zeros(top)
+    dealt[0] = 1.0
+    standing_before = np.ones(len(hps))
+    pmf = []
+
+    for round_number in range(max_rounds):
+        dealt = convolve_pmf(dealt, per_round[min(round_number, len(per_round) - 1)])[:top]
+
+        standing = np.cumsum(dealt)[hps - 1]
+        pmf.append(standing_before - standing)
+        standing_before = standing
+
+        if standing.max() < epsilon:
+            break
+
+    pmf = np.array(pmf).T
+    if np.ndim(hp) == 0:
+        return KillResult(int(hp), pmf[0], float(standing_before[0]))
+    return KillResult(hps, pmf, standing_before)
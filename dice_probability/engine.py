@@ -0,0 +1,314 @@
+'''
+Array versions of the occurence dictionaries used in core.py.
+
+A die (or a combination of dice) is stored as an offset and a vector of occurences,
+so {3: 1, 4: 2, 5: 1} becomes offset 3 with counts [1, 2, 1]. Adding dice together
+is then just a convolution of the count vectors, which numpy does a lot faster
+than looping over two dictionaries.
+
+The occurences are kept as exact integers. As long as the total number of occurences
+fits comfortably in an int64 we use int64 arrays, otherwise we switch to object arrays
+holding python ints so nothing overflows.
+'''
+
+import math
+
+import numpy as np
+
+from .instrument import instrumented
+
+#Anything below this can safely be stored in an int64 array
+INT64_LIMIT = 2 ** 62
+
+#Above this number of total occurences the float rounding in the fft could
+#give a wrong count, so we only use the fft when the totals stay below it
+FFT_EXACT_LIMIT = 2 ** 40
+
+#Only use the fft when both supports are wide, for small dice np.convolve is faster
+FFT_MIN_SIZE = 256
+
+
+#The ways occurences can be turned into probabilities:
+#'float' is plain python division, 'exact' gives Fractions,
+#'float64' and 'float32' divide everything at once with numpy
+PRECISIONS = ('float', 'exact', 'float64', 'float32')
+
+
+def check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}, use one of: {', '.join(PRECISIONS)}")
+
+
+def _counts_dtype(total):
+    return np.int64 if total < INT64_LIMIT else object
+
+
+def _values_dtype(values):
+    #Integer occurences are counted exactly. Dictionaries with probabilities are still
+    #added up: floats as float64, anything else (like Fractions) as python objects
+    if all(isinstance(value, (int, np.integer)) for value in values):
+        return _counts_dtype(sum(values))
+    if all(isinstance(value, (int, float, np.integer, np.floating)) for value in values):
+        return np.float64
+    return object
+
+
+def to_array(die):
+    '''
+    Turns an occurence dictionary into an (offset, counts) pair.
+    Rolls that are missing from the dictionary get 0 occurences.
+    The values are never truncated: probabilities give a float64 or object array.
+    '''
+    if not die:
+        return 0, np.zeros(0, dtype=np.int64)
+
+    low = min(die)
+    high = max(die)
+
+    counts = np.zeros(high - low + 1, dtype=_values_dtype(list(die.values())))
+    for roll, occ in die.items():
+        counts[roll - low] = occ
+
+    return low, counts
+
+
+def from_array(offset, counts):
+    '''
+    Turns an (offset, counts) pair back into an occurence dictionary with python ints.
+    Rolls with 0 occurences are left out, just like the dictionaries in core.py.
+    '''
+    return {offset + i: occ for i, occ in enumerate(counts.tolist()) if occ}
+
+
+def total(counts):
+    '''Total number of occurences in a count vector, as a python int (or float for probabilities).'''
+    return sum(counts.tolist())
+
+
+def _fft_convolve(a, b):
+    size = len(a) + len(b) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    spectrum = np.fft.rfft(a, fft_size) * np.fft.rfft(b, fft_size)
+    result = np.fft.irfft(spectrum, fft_size)[:size]
+    return np.rint(result).astype(np.int64)
+
+
+@instrumented
+def convolve(a, b):
+    '''
+    Convolves two count vectors, which is the same as adding the two dice together.
+    The result is exact for occurences. Wide supports with small totals go through the fft,
+    everything else through np.convolve.
+    '''
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    #Big integers, Fractions and floats (probabilities instead of occurences, see to_array)
+    if a.dtype == object or b.dtype == object:
+        return np.convolve(a.astype(object), b.astype(object))
+    if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+        return np.convolve(a.astype(np.float64), b.astype(np.float64))
+
+    result_total = total(a) * total(b)
+
+    if result_total >= INT64_LIMIT:
+        return np.convolve(a.astype(object), b.astype(object))
+
+    a = a.astype(np.int64, copy=False)
+    b = b.astype(np.int64, copy=False)
+
+    if min(len(a), len(b)) >= FFT_MIN_SIZE and result_total < FFT_EXACT_LIMIT:
+        return _fft_convolve(a, b)
+
+    return np.convolve(a, b)
+
+
+@instrumented
+def deconvolve(a, b):
+    '''
+    The exact inverse of convolve: returns the counts x for which convolve(x, b) is a,
+    which is the same as taking die b back out of a pool. Raises a ValueError if b was
+    never part of a. For a regular die (all ones) this is a running sum over every
+    len(b)-th roll, otherwise it is long division of the two polynomials.
+    '''
+    size = len(a) - len(b) + 1
+    if len(b) == 0 or size < 1 or b[0] == 0:
+        raise ValueError("Can't take these dice out of the pool")
+
+    if (b == 1).all():
+        #a[n] - a[n - 1] = x[n] - x[n - len(b)], so x adds up the differences every len(b) steps
+        steps = np.diff(a[:size], prepend=a[:1] * 0)
+        padded = np.zeros(-(-size // len(b)) * len(b), dtype=steps.dtype)
+        padded[:size] = steps
+        x = padded.reshape(-1, len(b)).cumsum(axis=0).ravel()[:size]
+        x_list = x.tolist()
+    else:
+        a_list, b_list = a.tolist(), b.tolist()
+        x_list = []
+        for n in range(size):
+            rest = a_list[n] - sum(b_list[j] * x_list[n - j] for j in range(1, min(n, len(b) - 1) + 1))
+            occ, remainder = divmod(rest, b_list[0])
+            if remainder:
+                raise ValueError("Can't take these dice out of the pool")
+            x_list.append(occ)
+        x = np.array(x_list, dtype=a.dtype)
+
+    #The first size rolls are exact by construction, the last len(b) - 1 still have to match
+    a_list, b_list = a.tolist(), b.tolist()
+    for n in range(size, len(a)):
+        if a_list[n] != sum(b_list[j] * x_list[n - j] for j in range(n - size + 1, min(n + 1, len(b)))):
+            raise ValueError("Can't take these dice out of the pool")
+    if min(x_list) < 0:
+        raise ValueError("Can't take these dice out of the pool")
+    return x
+
+
+def add(first, second):
+    '''Adds two (offset, counts) pairs together.'''
+    offset_a, counts_a = first
+    offset_b, counts_b = second
+    return offset_a + offset_b, convolve(counts_a, counts_b)
+
+
+def sum_dice(dice):
+    '''
+    Adds a sequence of (offset, counts) pairs together.
+    Returns an empty pair if there is nothing to add.
+    '''
+    result = None
+    for die in dice:
+        result = die if result is None else add(result, die)
+
+    if result is None:
+        return 0, np.zeros(0, dtype=np.int64)
+    return result
+
+
+@instrumented
+def split_crit(die):
+    '''
+    Splits the first die of a check into regular rolls, crit fails and crit hits.
+    The first entry of the dictionary is the crit fail and the last entry is the crit hit.
+    '''
+    items = list(die.items())
+    regular = dict(items[1:-1])
+    fumble = dict(items[:1])
+    crit = dict(items[-1:])
+    return [to_array(regular), to_array(fumble), to_array(crit)]
+
+
+def negate(die):
+    '''
+    Flips the sign of every roll of an (offset, counts) pair.
+    Keeping the lowest dice is the same as keeping the highest dice of the negated die.
+    '''
+    offset, counts = die
+    return -(offset + len(counts) - 1), counts[::-1]
+
+
+def power(die, n):
+    '''
+    Adds n copies of the same (offset, counts) pair together.
+    Uses repeated squaring, so only about 2 * log2(n) convolutions are needed.
+    '''
+    if n == 0:
+        return 0, np.ones(1, dtype=np.int64)
+
+    result = None
+    while n:
+        if n & 1:
+            result = die if result is None else add(result, die)
+        n >>= 1
+        if n:
+            die = add(die, die)
+    return result
+
+
+def _keep_highest_single(counts, n):
+    #The chance that the highest of n dice is at most x is cdf(x) ** n.
+    #With occurences instead of chances the same holds, so the number of
+    #occurences of each roll is cdf(x) ** n - cdf(x - 1) ** n
+    result = []
+    previous = 0
+    cdf = 0
+    for occ in counts.tolist():
+        cdf += occ
+        current = cdf ** n
+        result.append(current - previous)
+        previous = current
+
+    return np.array(result, dtype=_counts_dtype(previous))
+
+
+def _keep_highest_many(counts, n, k):
+    #We walk over the rolls from high to low and keep track of how many dice are
+    #already placed on a roll at least this high (m) and the sum of the kept dice.
+    #Once k dice are placed, the remaining dice can be anything lower than the current
+    #roll, which is just a power of the cdf, so we never need to enumerate them.
+    rolls = counts.tolist()
+    span = len(rolls) - 1
+    dtype = _counts_dtype(total(counts) ** n)
+
+    cdf_below = [0]
+    for occ in rolls[:-1]:
+        cdf_below.append(cdf_below[-1] + occ)
+
+    size = k * span + 1
+    result = np.zeros(size, dtype=dtype)
+    states = [np.zeros(size, dtype=dtype) for _ in range(k)]
+    states[0][0] = 1
+
+    for roll in range(span, -1, -1):
+        weight = rolls[roll]
+        if not weight:
+            continue
+        below = cdf_below[roll]
+
+        new_states = [state.copy() for state in states]
+        for m, state in enumerate(states):
+            if not state.any():
+                continue
+            for j in range(1, n - m + 1):
+                ways = math.comb(n - m, j) * weight ** j
+                if m + j < k:
+                    shift = j * roll
+                    new_states[m + j][shift:] += state[:size - shift] * ways
+                else:
+                    shift = (k - m) * roll
+                    rest = below ** (n - m - j)
+                    if rest:
+                        result[shift:] += state[:size - shift] * (ways * rest)
+        states = new_states
+
+    return result
+
+
+@instrumented
+def keep_highest(die, n, k = 1):
+    '''
+    Number of occurences of the sum of the k highest dice when rolling n copies
+    of an (offset, counts) pair. This works with any die, not just 1 to N,
+    and stays exact for large n because only python ints are used for big totals.
+    '''
+    if n < 1 or not 1 <= k <= n:
+        raise ValueError('Need n >= 1 and 1 <= k <= n')
+
+    offset, counts = die
+    if len(counts) == 0:
+        return die
+
+    if k == n:
+        return power(die, n)
+
+    if k == 1:
+        return offset, _keep_highest_single(counts, n)
+
+    return k * offset, _keep_highest_many(counts, n, k)
+
+
+def keep_lowest(die, n, k = 1):
+    '''
+    Number of occurences of the sum of the k lowest dice when rolling n copies
+    of an (offset, counts) pair.
+    '''
+    return negate(keep_highest(negate(die), n, k))
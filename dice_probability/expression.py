@@ -0,0 +1,202 @@
+'''
+Dice expressions like 'd20 adv2 + 2d8 + d4 + 5' or '4d6kh3'.
+
+An expression is a sum of terms. A term is a flat number or a number of dice,
+optionally followed by one of these:
+    adv, advN   roll 1 + N dice and keep the highest (advantage, adv is adv1)
+    dis, disN   roll 1 + N dice and keep the lowest (disadvantage)
+    khK, klK    keep the K highest / lowest dice
+    dhK, dlK    drop the K highest / lowest dice
+Terms can be subtracted as well as added.
+
+compile_expression() turns an expression into a Plan. Identical terms are grouped, so
+'d8 + d8 + 2d8' becomes four d8s that are added with repeated squaring. Plans are
+cached on the normalized expression, and a plan remembers its distribution once it
+has been calculated, so asking for the same expression again does no work at all.
+'''
+
+import re
+
+from . import engine
+from .cache import DistributionCache
+from .core import die_probs
+from .distribution import Distribution
+
+_TERM = re.compile(r'([+-])(?:(\d*)d(\d+)(?:(adv|dis|kh|kl|dh|dl)(\d*))?|(\d+))')
+_KEEP = re.compile(r'(adv|dis|kh|kl|dh|dl)')
+
+#Compiled plans, keyed on the normalized expression
+plan_cache = DistributionCache(maxsize = 256)
+
+
+def normalize(expression):
+    '''
+    Lower case without any whitespace, with an explicit sign in front of the first term.
+    Whitespace separates terms, so 'd20 5' is an error and not a d205. The only thing
+    that can follow a term after a space is its keep option, like in 'd20 adv2'.
+    '''
+    words = expression.lower().split()
+    for word, next_word in zip(words, words[1:]):
+        if word.endswith(('+', '-')) or next_word.startswith(('+', '-')):
+            continue
+        if not (re.search(r'd\d+$', word) and _KEEP.match(next_word)):
+            raise ValueError(f"Need a + or - between {word!r} and {next_word!r} in {expression!r}")
+    text = ''.join(words)
+    if not text.startswith(('+', '-')):
+        text = '+' + text
+    return text
+
+
+def parse(expression):
+    '''
+    Splits an expression into its terms. Returns a list of dice terms as
+    (sign, count, sides, keep, keep_count) tuples and the flat modifier.
+    keep is None, 'adv', 'dis', 'kh', 'kl', 'dh' or 'dl'.
+    '''
+    text = normalize(expression)
+    terms = []
+    mod = 0
+    position = 0
+
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if not match:
+            raise ValueError(f"Can't read dice expression {expression!r} at {text[position:]!r}")
+        position = match.end()
+
+        sign, count, sides, keep, keep_count, number = match.groups()
+        sign = -1 if sign == '-' else 1
+
+        if number is not None:
+            mod += sign * int(number)
+            continue
+
+        count = int(count) if count else 1
+        sides = int(sides)
+        if count < 1 or sides < 1:
+            raise ValueError(f'Need at least one die with at least one side in {expression!r}')
+
+        if keep is None:
+            keep_count = None
+        elif keep in ('adv', 'dis'):
+            if count != 1:
+                raise ValueError(f'{keep} only works on a single die, use kh/kl for more dice')
+            keep_count = int(keep_count) if keep_count else 1
+        else:
+            if not keep_count:
+                raise ValueError(f'{keep} needs a number of dice in {expression!r}')
+            keep_count = int(keep_count)
+            low, high = (1, count) if keep in ('kh', 'kl') else (0, count - 1)
+            if not low <= keep_count <= high:
+                raise ValueError(f"Can't {keep}{keep_count} from {count} dice")
+
+        terms.append((sign, count, sides, keep, keep_count))
+
+    return terms, mod
+
+
+def _term_distribution(sign, count, sides, keep, keep_count):
+    #The distribution of a single unit of a term, and how many of those units the term has
+    die = Distribution.die(sides)
+
+    if keep is None:
+        unit, copies = die, count
+    elif keep == 'adv':
+        unit, copies = die.highest(keep_count + 1), 1
+    elif keep == 'dis':
+        unit, copies = die.lowest(keep_count + 1), 1
+    elif keep == 'kh':
+        unit, copies = die.highest(count, keep_count), 1
+    elif keep == 'kl':
+        unit, copies = die.lowest(count, keep_count), 1
+    elif keep == 'dh':
+        unit, copies = die.lowest(count, count - keep_count), 1
+    else:
+        unit, copies = die.highest(count, count - keep_count), 1
+
+    if sign < 0:
+        unit = Distribution(*engine.negate((unit.offset, unit.counts)))
+    return unit, copies
+
+
+class Plan:
+    '''
+    A compiled dice expression. The first die of the expression is the one that
+    decides crits, just like the first die passed to many_dice.
+    groups holds (Distribution, number of copies) pairs for everything after that die.
+    '''
+    __slots__ = ('expression', 'first', 'groups', 'mod', '_results')
+
+    def __init__(self, expression, first, groups, mod):
+        self.expression = expression
+        self.first = first
+        self.groups = groups
+        self.mod = mod
+        self._results = {}
+
+    def __repr__(self):
+        return f'Plan({self.expression!r})'
+
+    def distribution(self, with_crit = False):
+        '''
+        The Distribution of the dice, without the flat modifier. With with_crit set to true
+        it is split into regular rolls, crit fails and crit hits.
+        '''
+        if with_crit not in self._results:
+            result = self.first.with_crit() if with_crit else self.first
+            for unit, copies in self.groups:
+                result = result + unit.times(copies)
+            self._results[with_crit] = result
+        return self._results[with_crit]
+
+    def occurences(self, with_crit = False):
+        '''The occurences of the dice without the modifier, in the same format as many_dice.'''
+        return self.distribution(with_crit).to_dicts()
+
+    def check(self, with_crit = True):
+        '''The pmf with the modifier added, in the same format as check.'''
+        pmf = [{}, {}, {}]
+        for i, sub_pmf in enumerate(die_probs(self.occurences(with_crit))):
+            pmf[i] = {roll + self.mod: prob for roll, prob in sub_pmf.items()}
+        return pmf
+
+    def pmf(self):
+        '''The pmf of the whole expression, modifier included, as a single dictionary.'''
+        return self.check(with_crit = False)[0]
+
+
+def _compile(text):
+    terms, mod = parse(text)
+    if not terms:
+        raise ValueError(f'Dice expression {text!r} has no dice')
+
+    #The first die is kept apart for the crits, the rest is grouped by identical term.
+    first_unit, first_copies = _term_distribution(*terms[0])
+    #Plain dice like 2d8 and d8 roll the same die, so they end up in the same group
+    groups = {}
+
+    def add_group(term, unit, copies):
+        sign, count, sides, keep, keep_count = term
+        key = (sign, sides) if keep is None else term
+        if key in groups:
+            groups[key][1] += copies
+        else:
+            groups[key] = [unit, copies]
+
+    if first_copies > 1:
+        add_group(terms[0], first_unit, first_copies - 1)
+    for term in terms[1:]:
+        add_group(term, *_term_distribution(*term))
+
+    return Plan(text, first_unit, [(unit, copies) for unit, copies in groups.values()], mod)
+
+
+def compile_expression(expression):
+    '''Parses and compiles a dice expression into a Plan, reusing plans that were compiled before.'''
+    text = normalize(expression)
+    return plan_cache.get(text, lambda: _compile(text))
+
+
+def roll_pmf(expression):
+    '''The pmf of a dice expression, modifier included, as a {roll: probability} dictionary.'''
+    return compile_expression(expression).pmf()
@@ -0,0 +1,134 @@
+'''
+Opt-in instrumentation for the dice engine.
+
+The hot functions are wrapped with @instrumented. As long as no sink is active, the
+wrapper only checks an empty list and calls the function, so the cost is close to nothing.
+When a sink is active, every call is reported to it with its name, the time it took
+and the size of the distribution it returned (the number of rolls). The time of a call
+includes the time of the instrumented calls it makes itself.
+
+    with profile() as counter:
+        attack_outcomes(d20, d8, defense = 14)
+    print(counter.report())
+
+Sinks are objects with a record(name, seconds, size) method. CounterSink keeps totals
+in memory, JsonLinesSink writes one JSON line per call.
+'''
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+#The sinks that currently receive measurements
+_sinks = []
+
+
+def distribution_size(result):
+    '''The number of rolls in a result: a dictionary, an array, a Distribution or a list or tuple of those.'''
+    if isinstance(result, dict):
+        return len(result)
+    if isinstance(result, np.ndarray):
+        return result.shape[-1] if result.ndim else 1
+    if isinstance(result, tuple):
+        #Parallel parts, like (offset, counts) or (outcomes, probs, cdf)
+        return max((distribution_size(part) for part in result), default = 0)
+    if isinstance(result, list):
+        #Either a list of rolls, or separate parts like the three crit dictionaries
+        if all(isinstance(part, (int, float)) for part in result):
+            return len(result)
+        return sum(distribution_size(part) for part in result)
+    if hasattr(result, '__len__'):
+        return len(result)
+    return 0
+
+
+def instrumented(function):
+    '''Decorator that reports every call of function to the active sinks.'''
+    name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__qualname__}"
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _sinks:
+            return function(*args, **kwargs)
+
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        size = distribution_size(result)
+        for sink in list(_sinks):
+            sink.record(name, seconds, size)
+        return result
+
+    return wrapper
+
+
+def add_sink(sink):
+    '''Starts sending measurements to sink.'''
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    '''Stops sending measurements to sink.'''
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+class CounterSink:
+    '''Keeps the number of calls, total time and distribution sizes per function in memory.'''
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, size):
+        with self._lock:
+            stats = self.stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'total_size': 0, 'max_size': 0})
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['total_size'] += size
+            stats['max_size'] = max(stats['max_size'], size)
+
+    def report(self):
+        '''A table of the measurements, the function with the most total time first.'''
+        lines = [f"{'function':<34}{'calls':>8}{'total (ms)':>12}{'avg size':>10}{'max size':>10}"]
+        for name, stats in sorted(self.stats.items(), key = lambda item: -item[1]['seconds']):
+            lines.append(f"{name:<34}{stats['calls']:>8}{stats['seconds'] * 1000:>12.3f}"
+                         f"{stats['total_size'] / stats['calls']:>10.1f}{stats['max_size']:>10}")
+        return '\n'.join(lines)
+
+
+class JsonLinesSink:
+    '''Writes every call as a line of JSON to a file (a path or an open text file).'''
+
+    def __init__(self, file):
+        self._owns_file = isinstance(file, str)
+        self.file = open(file, 'a') if self._owns_file else file
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, size):
+        line = json.dumps({'time': time.time(), 'name': name, 'seconds': seconds, 'size': size})
+        with self._lock:
+            self.file.write(line + '\n')
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+
+@contextmanager
+def profile(sink = None):
+    '''
+    Measures all instrumented calls inside the with block.
+    Uses a new CounterSink unless another sink is given, and hands it to the with block.
+    '''
+    sink = CounterSink() if sink is None else sink
+    add_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_sink(sink)
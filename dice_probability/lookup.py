@@ -0,0 +1,117 @@
+'''
+A precomputed table with the common d20 checks.
+
+The checks people make most are a d20 with -5 to +5 net advantage and 0 to 3 each of
+d8, d6 and d4 help dice. That is only 704 combinations, so we calculate all of them once,
+with the crits split off, and store the occurences in a single .npy file next to a small
+JSON index. At runtime the table is opened with numpy.load(mmap_mode = 'r'), so looking
+up a check doesn't calculate anything, and processes that use the table share the same pages.
+
+The modifier isn't part of the table, it only shifts the rolls.
+
+Rebuild the table with: python -m dice_probability.lookup
+'''
+
+import functools
+import itertools
+import json
+import os
+
+import numpy as np
+
+from .core import check, many_dice
+from .scenario import Scenario
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+TABLE_PATH = os.path.join(DATA_DIR, 'check_table.npy')
+INDEX_PATH = os.path.join(DATA_DIR, 'check_table.json')
+
+ADVANTAGE = range(-5, 6)
+HELP_DICE = range(0, 4)
+
+#The lowest roll is a 1 on the d20 with no help dice, the highest a 20 plus all help dice at their highest
+LOWEST_ROLL = 1
+HIGHEST_ROLL = 20 + 3 * (8 + 6 + 4)
+
+
+def configurations():
+    '''Every (advantage, help_d8, help_d6, help_d4) combination in the table, in table order.'''
+    return list(itertools.product(ADVANTAGE, HELP_DICE, HELP_DICE, HELP_DICE))
+
+
+def build_table(table_path = TABLE_PATH, index_path = INDEX_PATH):
+    '''
+    Calculates every check in the table and saves the occurences to table_path,
+    with shape (configurations, 3, rolls). The three rows are the regular rolls,
+    crit fails and crit hits, like many_dice with with_crit = True.
+    '''
+    configs = configurations()
+    width = HIGHEST_ROLL - LOWEST_ROLL + 1
+    table = np.zeros((len(configs), 3, width), dtype = np.int64)
+
+    for row, (advantage, help_d8, help_d6, help_d4) in enumerate(configs):
+        dice = Scenario(advantage, (8,) * help_d8 + (6,) * help_d6 + (4,) * help_d4).dice()
+        for channel, occurences in enumerate(many_dice(dice, with_crit = True)):
+            for roll, occ in occurences.items():
+                table[row, channel, roll - LOWEST_ROLL] = occ
+
+    os.makedirs(os.path.dirname(table_path), exist_ok = True)
+    np.save(table_path, table)
+    with open(index_path, 'w') as file:
+        json.dump({'lowest_roll': LOWEST_ROLL,
+                   'columns': ['advantage', 'help_d8', 'help_d6', 'help_d4'],
+                   'rows': [list(config) for config in configs]}, file)
+
+
+@functools.lru_cache(maxsize = None)
+def load_table(table_path = TABLE_PATH, index_path = INDEX_PATH):
+    '''
+    Opens the table as a read only memory map and returns it together with a
+    {(advantage, help_d8, help_d6, help_d4): row} index and the lowest roll.
+    '''
+    table = np.load(table_path, mmap_mode = 'r')
+    with open(index_path) as file:
+        index = json.load(file)
+    rows = {tuple(config): row for row, config in enumerate(index['rows'])}
+    return table, rows, index['lowest_roll']
+
+
+def lookup_check(advantage = 0, help_d8 = 0, help_d6 = 0, help_d4 = 0, mod = 0):
+    '''
+    The same pmf as check() with a d20 with the given net advantage and help dice,
+    read from the precomputed table. Combinations that aren't in the table (or a missing
+    table) fall back to calculating the check.
+    '''
+    try:
+        table, rows, lowest_roll = load_table()
+        row = rows[(advantage, help_d8, help_d6, help_d4)]
+    except (OSError, KeyError):
+        dice = Scenario(advantage, (8,) * help_d8 + (6,) * help_d6 + (4,) * help_d4).dice()
+        return check(dice, mod = mod, with_crit = True)
+
+    counts = table[row].tolist()
+    total = sum(sum(channel) for channel in counts)
+    return [{lowest_roll + i + mod: occ / total for i, occ in enumerate(channel) if occ}
+            for channel in counts]
+
+
+def lookup_roll(advantage = 0, help_d8 = 0, help_d6 = 0, help_d4 = 0, mod = 0):
+    '''
+    The pmf of the whole roll without the crit split, as a single dictionary,
+    read from the precomputed table when the combination is in there.
+    '''
+    try:
+        table, rows, lowest_roll = load_table()
+        row = rows[(advantage, help_d8, help_d6, help_d4)]
+    except (OSError, KeyError):
+        dice = Scenario(advantage, (8,) * help_d8 + (6,) * help_d6 + (4,) * help_d4).dice()
+        return check(dice, mod = mod, with_crit = False)[0]
+
+    counts = [sum(occs) for occs in zip(*table[row].tolist())]
+    total = sum(counts)
+    return {lowest_roll + i + mod: occ / total for i, occ in enumerate(counts) if occ}
+
+
+if __name__ == '__main__':
+    build_table()
+    print(f'Saved {len(configurations())} checks to {TABLE_PATH}')
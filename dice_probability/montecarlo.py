@@ -0,0 +1,176 @@
+'''
+A Monte Carlo simulator for scenarios.
+
+The exact engine covers everything that is a sum of independent dice. Some rules don't fit
+that, like rerolling low results or exploding dice, so for those we roll the dice instead.
+The simulator takes the same Scenario as evaluate(), rolls millions of checks at once with
+numpy, and uses the same damage rules as attack_outcomes (damage.damage_on_rolls).
+Without the extra rules its results should agree with evaluate() within the confidence intervals.
+
+Every simulation uses its own numpy Generator. simulate_parallel() gives each process an
+independent stream from one SeedSequence, so a seed always gives the same result.
+'''
+
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from . import damage
+
+#Number of rolls simulated at once, to keep the memory use bounded
+BATCH_SIZE = 1_000_000
+
+#Exploding dice stop after this many extra rolls
+MAX_EXPLOSIONS = 20
+
+
+class MonteCarloResult(namedtuple('MonteCarloResult', ['n', 'damage_counts', 'damage_sum', 'damage_sum_sq',
+                                                       'hits', 'crits', 'fumbles'])):
+    '''
+    The totals of a simulation. damage_counts is a {damage: number of rolls} dictionary.
+    The averages and chances are properties, interval() gives confidence intervals.
+    '''
+    __slots__ = ()
+
+    @property
+    def expected_damage(self):
+        return self.damage_sum / self.n
+
+    @property
+    def hit_chance(self):
+        return self.hits / self.n
+
+    @property
+    def crit_chance(self):
+        return self.crits / self.n
+
+    @property
+    def fumble_chance(self):
+        return self.fumbles / self.n
+
+    def damage_pmf(self):
+        '''The simulated damage pmf as a {damage: probability} dictionary.'''
+        return {value: count / self.n for value, count in sorted(self.damage_counts.items())}
+
+    def interval(self, name = 'expected_damage', confidence = 0.95):
+        '''
+        A normal approximation confidence interval for expected_damage, hit_chance,
+        crit_chance or fumble_chance, as a (low, high) pair.
+        '''
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        if name == 'expected_damage':
+            mean = self.expected_damage
+            variance = max(self.damage_sum_sq / self.n - mean ** 2, 0.0)
+        else:
+            mean = getattr(self, name)
+            variance = mean * (1 - mean)
+        margin = z * math.sqrt(variance / self.n)
+        return mean - margin, mean + margin
+
+    def combine(self, other):
+        '''Adds the totals of two simulations of the same scenario together.'''
+        counts = dict(self.damage_counts)
+        for value, count in other.damage_counts.items():
+            counts[value] = counts.get(value, 0) + count
+        return MonteCarloResult(self.n + other.n, counts,
+                                self.damage_sum + other.damage_sum,
+                                self.damage_sum_sq + other.damage_sum_sq,
+                                self.hits + other.hits,
+                                self.crits + other.crits,
+                                self.fumbles + other.fumbles)
+
+
+def _roll_help_dice(rng, sides, size, explode):
+    rolls = rng.integers(1, sides + 1, size = size)
+    if not explode:
+        return rolls
+
+    #A die that rolls its highest value is rolled again and added
+    total = rolls.copy()
+    exploding = rolls == sides
+    for _ in range(MAX_EXPLOSIONS):
+        if not exploding.any():
+            break
+        extra = rng.integers(1, sides + 1, size = int(exploding.sum()))
+        total[exploding] += extra
+        still = np.zeros_like(exploding)
+        still[exploding] = extra == sides
+        exploding = still
+    return total
+
+
+def _simulate_batch(scenario, size, rng, reroll_below, explode_help_dice):
+    #The base die, with advantage or disadvantage, and crits on the kept die
+    dice_count = abs(scenario.advantage) + 1
+    base = rng.integers(1, scenario.base + 1, size = (size, dice_count))
+    if reroll_below:
+        low = base <= reroll_below
+        base[low] = rng.integers(1, scenario.base + 1, size = int(low.sum()))
+    kept = base.max(axis = 1) if scenario.advantage >= 0 else base.min(axis = 1)
+
+    crit = kept == scenario.base
+    fumble = kept == 1
+
+    total = kept + scenario.mod
+    for sides in scenario.help_dice:
+        total += _roll_help_dice(rng, sides, size, explode_help_dice)
+
+    attack = scenario.attack_kwargs()
+    damage_on_roll = damage.damage_on_rolls(total, crit = crit, fumble = fumble, **attack)
+    hit = (crit | (total >= attack['defense'])) & ~fumble
+
+    values, counts = np.unique(damage_on_roll, return_counts = True)
+    damage_float = damage_on_roll.astype(np.float64)
+    return MonteCarloResult(size,
+                            dict(zip(values.tolist(), counts.tolist())),
+                            float(damage_float.sum()),
+                            float((damage_float ** 2).sum()),
+                            int(hit.sum()),
+                            int(crit.sum()),
+                            int(fumble.sum()))
+
+
+def simulate(scenario, n = 1_000_000, seed = None, reroll_below = 0, explode_help_dice = False):
+    '''
+    Simulates n rolls of a Scenario and returns a MonteCarloResult.
+    seed can be anything numpy.random.default_rng accepts, including a SeedSequence.
+    reroll_below rerolls base dice that show this value or lower once.
+    explode_help_dice rolls a help die again and adds it every time it shows its highest value.
+    '''
+    rng = np.random.default_rng(seed)
+    result = None
+    for start in range(0, n, BATCH_SIZE):
+        batch = _simulate_batch(scenario, min(BATCH_SIZE, n - start), rng, reroll_below, explode_help_dice)
+        result = batch if result is None else result.combine(batch)
+    return result
+
+
+def _simulate_job(job):
+    scenario, n, seed, options = job
+    return simulate(scenario, n, seed, **options)
+
+
+def simulate_parallel(scenario, n = 10_000_000, seed = None, workers = None, **options):
+    '''
+    Splits a simulation over several processes, each with an independent random stream
+    spawned from the same SeedSequence. The other keyword arguments go to simulate().
+    '''
+    workers = workers or os.cpu_count() or 1
+    streams = np.random.SeedSequence(seed).spawn(workers)
+    sizes = [n // workers + (i < n % workers) for i in range(workers)]
+    jobs = [(scenario, size, stream, options) for size, stream in zip(sizes, streams) if size]
+
+    if len(jobs) == 1:
+        results = [_simulate_job(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            results = list(executor.map(_simulate_job, jobs))
+
+    result = results[0]
+    for other in results[1:]:
+        result = result.combine(other)
+    return result
@@ -0,0 +1,95 @@
+'''
+Evaluating large lists of scenarios on all cores.
+
+The scenarios are cut into chunks and every chunk is evaluated in a separate process.
+Each worker process has its own distribution cache, so scenarios in the same chunk that
+share a dice pool only calculate it once. The results are sent back as a few flat numpy
+arrays per chunk instead of pickled dictionaries, and come back in the same order as
+the scenarios went in.
+'''
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .scenario import ScenarioResult, evaluate
+
+
+def _evaluate_chunk(scenarios):
+    #Packs the results of a chunk into flat arrays: one row of numbers per scenario,
+    #and all damage pmfs glued together with their lengths so they can be cut apart again
+    results = [evaluate(scenario) for scenario in scenarios]
+
+    stats = np.array([result[:5] for result in results], dtype = np.float64).reshape(len(results), 5)
+    lengths = np.array([len(result.damage_pmf) for result in results], dtype = np.int64)
+    pmfs = np.concatenate([result.damage_pmf for result in results]) if results else np.zeros(0)
+
+    return stats, lengths, pmfs
+
+
+def _unpack_chunk(packed):
+    stats, lengths, pmfs = packed
+    pieces = np.split(pmfs, np.cumsum(lengths)[:-1])
+
+    return [ScenarioResult(expected, hit, crit, fumble, int(offset), pmf)
+            for (expected, hit, crit, fumble, offset), pmf in zip(stats.tolist(), pieces)]
+
+
+def chunk(scenarios, chunksize):
+    '''Cuts a list of scenarios into lists of at most chunksize scenarios.'''
+    return [scenarios[start:start + chunksize] for start in range(0, len(scenarios), chunksize)]
+
+
+def run_scenarios(scenarios, workers = None, chunksize = None):
+    '''
+    Evaluates a list of Scenarios and returns a list of ScenarioResults in the same order.
+    workers is the number of processes, by default one per core. With workers = 1
+    everything runs in this process. chunksize is the number of scenarios sent to a
+    worker at once, by default the list is split into about 4 chunks per worker.
+    '''
+    scenarios = list(scenarios)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, -(-len(scenarios) // (workers * 4)))
+
+    chunks = chunk(scenarios, chunksize)
+
+    if workers == 1:
+        packed = map(_evaluate_chunk, chunks)
+        return [result for part in packed for result in _unpack_chunk(part)]
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        #executor.map hands the results back in the order of the chunks
+        packed = executor.map(_evaluate_chunk, chunks)
+        return [result for part in packed for result in _unpack_chunk(part)]
+
+
+def iter_results(scenarios, workers = 1, chunksize = 1000):
+    '''
+    Evaluates scenarios from any iterable and yields (scenario, ScenarioResult) pairs in order.
+    Only a few chunks per worker are in flight at any time, so the scenarios can come from
+    a generator of any length without everything ending up in memory.
+    '''
+    scenarios = iter(scenarios)
+    chunks = iter(lambda: list(itertools.islice(scenarios, chunksize)), [])
+
+    if workers == 1:
+        for part in chunks:
+            yield from zip(part, _unpack_chunk(_evaluate_chunk(part)))
+        return
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        pending = deque()
+        for part in chunks:
+            pending.append((part, executor.submit(_evaluate_chunk, part)))
+            if len(pending) >= workers * 2:
+                part, future = pending.popleft()
+                yield from zip(part, _unpack_chunk(future.result()))
+
+        while pending:
+            part, future = pending.popleft()
+            yield from zip(part, _unpack_chunk(future.result()))
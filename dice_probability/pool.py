@@ -0,0 +1,102 @@
+'''
+A dice pool that is updated in place instead of recalculated.
+
+In the app most changes only touch one die: a help d4 is toggled, or the advantage goes
+up by one. Recalculating the whole pool with many_dice for that gets slower the more dice
+there are. A DicePool keeps its two factors apart: the base die with its advantage, and
+the sum of the help dice. The pool is the base added to the help dice.
+
+Adding a help die is a single convolution of the pool with that die. Removing one is the
+exact inverse (engine.deconvolve), which for a regular die is a single pass over the rolls.
+Changing the advantage only swaps the base factor, the help dice are added to the new base
+with one convolution. Base dice that were already used are kept, so going back and forth
+between two advantages doesn't calculate anything new.
+'''
+
+import numpy as np
+
+from .core import create_die, die_probs
+from .distribution import Distribution
+
+
+class DicePool:
+    '''
+    A base die with net advantage (negative for disadvantage) plus help dice, given as
+    a list of die sizes like Scenario. With with_crit the pool keeps crit fails and crit hits
+    of the base die apart, like many_dice(..., with_crit = True).
+    '''
+
+    def __init__(self, advantage = 0, help_dice = (), base = 20, with_crit = True):
+        self.base = int(base)
+        self.with_crit = with_crit
+        self.advantage = int(advantage)
+        self._help_dice = []
+        self._bases = {}
+        self._help = Distribution(0, np.ones(1, dtype = np.int64))
+        self._pool = None
+        for sides in help_dice:
+            self.add_die(sides)
+
+    @classmethod
+    def from_scenario(cls, scenario, with_crit = True):
+        '''A pool with the base die, advantage and help dice of a Scenario.'''
+        return cls(scenario.advantage, scenario.help_dice, scenario.base, with_crit)
+
+    @property
+    def help_dice(self):
+        '''The help dice in the pool, largest first.'''
+        return tuple(sorted(self._help_dice, reverse = True))
+
+    def _base_die(self, advantage):
+        #The base factor for an advantage, split for crits when needed
+        if advantage not in self._bases:
+            die = Distribution.die(self.base)
+            if advantage > 0:
+                die = die.highest(advantage + 1)
+            elif advantage < 0:
+                die = die.lowest(-advantage + 1)
+            self._bases[advantage] = die.with_crit() if self.with_crit else die
+        return self._bases[advantage]
+
+    def add_die(self, sides):
+        '''Adds a help die to the pool.'''
+        die = Distribution.die(int(sides))
+        self._help_dice.append(int(sides))
+        self._help = self._help + die
+        if self._pool is not None:
+            self._pool = self._pool + die
+        return self
+
+    def remove_die(self, sides):
+        '''Takes a help die out of the pool.'''
+        if int(sides) not in self._help_dice:
+            raise ValueError(f'There is no d{sides} in the pool')
+        die = Distribution.die(int(sides))
+        self._help_dice.remove(int(sides))
+        self._help = self._help.remove(die)
+        if self._pool is not None:
+            self._pool = self._pool.remove(die)
+        return self
+
+    def set_advantage(self, advantage):
+        '''Changes the net advantage of the base die, the help dice stay as they are.'''
+        if int(advantage) != self.advantage:
+            self.advantage = int(advantage)
+            self._pool = None
+        return self
+
+    def distribution(self):
+        '''The whole pool as a Distribution, three rows when it is split for crits.'''
+        if self._pool is None:
+            self._pool = self._base_die(self.advantage) + self._help
+        return self._pool
+
+    def dice(self):
+        '''The dice of the pool as occurence dictionaries, ready to pass to check().'''
+        return (self._base_die(self.advantage).to_dict(),) + tuple(create_die(sides) for sides in self.help_dice)
+
+    def check(self, mod = 0, precision = 'float'):
+        '''The same pmf as check() on the dice of this pool.'''
+        pmf = [{roll + mod: prob for roll, prob in sub_pmf.items()}
+               for sub_pmf in die_probs(self.distribution().to_dicts(), precision = precision)]
+        return pmf + [{}] * (3 - len(pmf))
@@ -0,0 +1,109 @@
+'''
+A single description of a roll and an attack, shared by the batch tools.
+
+A Scenario holds the base die, the net advantage, the help dice, the modifier and the
+attack profile (the keyword arguments of attack_outcomes). evaluate() turns it into
+the expected damage, the hit/crit/fumble chances and the damage pmf.
+'''
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import damage
+from .core import Adv, check, create_die, disAdv
+
+#The attack_outcomes keyword arguments a scenario can set, with their defaults
+ATTACK_DEFAULTS = {'defense': 10,
+                   'base_damage': 1,
+                   'bonus_damage': 0,
+                   'impact': False,
+                   'dr': 0,
+                   'bonus_reduction': 0,
+                   'type_multiplier': 1,
+                   'type_adder': 0,
+                   'gwf': False,
+                   'brutal_strikes': False}
+
+
+class Scenario(namedtuple('Scenario', ['advantage', 'help_dice', 'mod', 'attack', 'base'])):
+    '''
+    A roll and attack profile. advantage is the net advantage, so negative numbers are
+    disadvantage. help_dice is a list of die sizes, e.g. (8, 6) for a d8 and a d6.
+    attack is a dictionary with attack_outcomes keyword arguments, anything left out
+    uses the defaults. Scenarios are hashable, so identical ones can be deduplicated.
+    '''
+    __slots__ = ()
+
+    def __new__(cls, advantage = 0, help_dice = (), mod = 0, attack = (), base = 20):
+        attack = dict(attack)
+        unknown = set(attack) - set(ATTACK_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown attack arguments: {', '.join(sorted(unknown))}")
+
+        return super().__new__(cls,
+                               int(advantage),
+                               tuple(sorted((int(sides) for sides in help_dice), reverse = True)),
+                               int(mod),
+                               tuple(sorted(attack.items())),
+                               int(base))
+
+    def base_die(self):
+        '''The base die with advantage or disadvantage applied.'''
+        die = create_die(self.base)
+        if self.advantage > 0:
+            return Adv(die, n = self.advantage + 1)
+        if self.advantage < 0:
+            return disAdv(die, n = -self.advantage + 1)
+        return die
+
+    def dice(self):
+        '''The base die followed by the help dice, ready to pass to check().'''
+        return (self.base_die(),) + tuple(create_die(sides) for sides in self.help_dice)
+
+    def pool(self):
+        '''The part of the scenario that decides the roll distribution, without the modifier.'''
+        return self.base, self.advantage, self.help_dice
+
+    def attack_kwargs(self):
+        '''The full set of attack_outcomes keyword arguments, defaults included.'''
+        return {**ATTACK_DEFAULTS, **dict(self.attack)}
+
+
+class ScenarioResult(namedtuple('ScenarioResult', ['expected_damage', 'hit_chance', 'crit_chance',
+                                                   'fumble_chance', 'damage_offset', 'damage_pmf'])):
+    '''
+    The outcome of a scenario. hit_chance includes crits. damage_pmf is a numpy array with the
+    chance of each damage value, starting at damage_offset. The chances are not rounded.
+    '''
+    __slots__ = ()
+
+    def damage_dict(self):
+        '''The damage pmf as a {damage: probability} dictionary, leaving out impossible values.'''
+        return {self.damage_offset + i: prob for i, prob in enumerate(self.damage_pmf.tolist()) if prob}
+
+
+def evaluate(scenario):
+    '''Evaluates a single Scenario and returns a ScenarioResult.'''
+    normals, fumbles, crits = check(scenario.dice(), mod = scenario.mod, with_crit = True)
+    return evaluate_rolls(*damage.flatten_check(normals, fumbles, crits), scenario.attack_kwargs())
+
+
+def evaluate_rolls(rolls, probs, crit, fumble, attack):
+    '''
+    Evaluates an attack on rolls that were already flattened with damage.flatten_check.
+    attack is the full set of attack keyword arguments. Returns a ScenarioResult.
+    '''
+    damage_on_roll = damage.damage_on_rolls(rolls, crit = crit, fumble = fumble, **attack)
+
+    offset = min(int(damage_on_roll.min(initial = 0)), 0)
+    damage_pmf = np.bincount(damage_on_roll - offset, weights = probs)
+
+    hit = (crit | (rolls >= attack['defense'])) & ~fumble
+
+    return ScenarioResult(float(damage_on_roll @ probs),
+                          float(probs[hit].sum()),
+                          float(probs[crit].sum()),
+                          float(probs[fumble].sum()),
+                          offset,
+                          damage_pmf)
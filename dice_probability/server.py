@@ -0,0 +1,209 @@
+'''
+A small local HTTP/JSON server for tools that need check and attack probabilities.
+
+Every tool that imports dice_probability pays the import and fills its own distribution
+cache. Running one server instead keeps a single warm cache for all of them. It only uses
+the standard library: asyncio handles the connections, and the calculations run in a
+thread pool, so the event loop stays responsive and all threads share the same
+distribution cache (a process pool would give every worker its own cold cache).
+
+Identical queries that arrive while the first one is still being calculated are not
+calculated again, they all wait for the same result.
+
+Start it with: python -m dice_probability.server --port 8765
+
+Endpoints (POST with a JSON body, the fields of a Scenario):
+    /check             {"advantage": 1, "help_dice": [8], "mod": 3}
+    /attack_outcomes   {"advantage": 1, "help_dice": [8], "mod": 3, "attack": {"defense": 14}}
+    /average_damage    same body as /attack_outcomes
+GET /stats returns the number of requests, calculations, coalesced requests and the cache stats.
+All endpoints also take "precision", like check(). Fractions are sent as "numerator/denominator" strings.
+'''
+
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from . import engine
+from .cache import cache_stats
+from .core import attack_outcomes, average_atk_damage, check
+from .scenario import Scenario
+
+SCENARIO_FIELDS = ('advantage', 'help_dice', 'mod', 'attack', 'base')
+
+#Requests with a bigger body are refused
+MAX_BODY = 64 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _check(scenario, precision):
+    normals, fumbles, crits = check(scenario.dice(), mod = scenario.mod, with_crit = True, precision = precision)
+    return {'normals': normals, 'fumbles': fumbles, 'crits': crits}
+
+
+def _attack_outcomes(scenario, precision):
+    return {'damage_pmf': attack_outcomes(scenario.dice(), mod = scenario.mod, precision = precision,
+                                          **scenario.attack_kwargs())}
+
+
+def _average_damage(scenario, precision):
+    damage_pmf = attack_outcomes(scenario.dice(), mod = scenario.mod, precision = precision,
+                                 **scenario.attack_kwargs())
+    return {'average_damage': average_atk_damage(damage_pmf)}
+
+
+#path: (function, whether the attack profile matters)
+ENDPOINTS = {'/check': (_check, False),
+             '/attack_outcomes': (_attack_outcomes, True),
+             '/average_damage': (_average_damage, True)}
+
+
+def parse_query(body):
+    '''Turns a JSON request body into a (Scenario, precision) pair, raises ValueError if it is invalid.'''
+    try:
+        query = json.loads(body or b'{}')
+    except json.JSONDecodeError as error:
+        raise ValueError(f'Invalid JSON: {error}')
+    if not isinstance(query, dict):
+        raise ValueError('The request body needs to be a JSON object')
+
+    precision = query.pop('precision', 'float')
+    engine.check_precision(precision)
+    unknown = set(query) - set(SCENARIO_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    attack = query.get('attack', {})
+    if not isinstance(attack, dict):
+        raise ValueError('attack needs to be a JSON object')
+    #Queries are used as dictionary keys, so every attack value has to be a plain number or bool
+    for name, value in attack.items():
+        if not isinstance(value, (bool, int, float)):
+            raise ValueError(f'{name} needs to be a number or a bool, not {value!r}')
+
+    try:
+        return Scenario(**query), precision
+    except TypeError as error:
+        raise ValueError(str(error))
+
+
+class DiceServer:
+    '''
+    Answers queries from a thread pool with coalescing of identical in-flight queries.
+    Use serve() to listen on a port, or query() directly from asyncio code.
+    '''
+
+    def __init__(self, workers = None):
+        self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'dice')
+        self.stats = {'requests': 0, 'calculated': 0, 'coalesced': 0}
+        self._in_flight = {}
+
+    async def query(self, path, scenario, precision = 'float'):
+        '''The JSON ready result of an endpoint for a scenario.'''
+        function, uses_attack = ENDPOINTS[path]
+        if not uses_attack:
+            scenario = scenario._replace(attack = ())
+        key = (path, scenario, precision)
+
+        self.stats['requests'] += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            self.stats['calculated'] += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, function, scenario, precision)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+
+        #shield, so a client that goes away doesn't cancel the result for the others
+        return await asyncio.shield(future)
+
+    async def respond(self, method, path, body):
+        '''Handles a single request, returns (status, JSON ready response).'''
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error': 'Use GET'}
+            return 200, {**self.stats, 'in_flight': len(self._in_flight), 'cache': cache_stats()}
+
+        if path not in ENDPOINTS:
+            return 404, {'error': f'Unknown endpoint {path}'}
+        if method != 'POST':
+            return 405, {'error': 'Use POST'}
+
+        try:
+            scenario, precision = parse_query(body)
+            return 200, await self.query(path, scenario, precision)
+        except ValueError as error:
+            return 400, {'error': str(error)}
+
+    async def handle(self, reader, writer):
+        #One connection, with any number of keep-alive requests on it
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    status, response = 413, {'error': 'Request body too large'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, response = await self.respond(method, target.split('?')[0], body)
+                    except Exception as error:
+                        status, response = 500, {'error': repr(error)}
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+
+                payload = json.dumps(response, default = str).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host = '127.0.0.1', port = 8765):
+        '''Listens for requests until the task is cancelled.'''
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            print(f'Serving dice probabilities on http://{host}:{port}', flush = True)
+            await server.serve_forever()
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = 'Local HTTP/JSON server for dice probabilities.')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8765)
+    parser.add_argument('--workers', type = int, default = None, help = 'threads that do the calculations')
+    args = parser.parse_args(argv)
+
+    server = DiceServer(args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(cancel_futures = True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+'''
+Finds the best build and attack options for a scenario.
+
+Questions like "against defense 15 and DR 2, is +2 to hit better than impact?" come down
+to evaluating every combination of options and ranking them. solve() does that, but avoids
+most of the work:
+
+- Candidates are grouped by their dice pool (advantage and help dice). A pool is calculated
+  and flattened once, and every to-hit bonus and attack option on it only shifts the rolls
+  and reruns the vectorized damage rules.
+- Every option can only help: more to hit, more advantage, bigger or more help dice and the
+  damage options never lower the damage of a roll. So the best a pool can do is its
+  candidate with every option at its best, and that is an upper bound for the pool. If the
+  bound can't beat the current top results, the pool is skipped. A pool that is dominated by
+  an already skipped pool (less advantage and smaller help dice) is skipped without even
+  being calculated.
+
+The bounds need damage that is never negative, so with a negative type_adder or
+type_multiplier the search falls back to evaluating everything.
+'''
+
+import itertools
+from collections import namedtuple
+
+from . import damage
+from .core import check
+from .scenario import Scenario, evaluate_rolls
+from .turn import turn_damage
+
+#The options solve() can search, with the values that count as "not changed"
+OPTIONS = {'to_hit': 0,
+           'advantage': 0,
+           'help_dice': (),
+           'bonus_damage': 0,
+           'impact': False,
+           'gwf': False,
+           'brutal_strikes': False}
+
+OBJECTIVES = ('expected_damage', 'kill_chance')
+
+
+class Choice(namedtuple('Choice', ['options', 'scenario', 'expected_damage', 'kill_chance'])):
+    '''
+    A ranked candidate. options holds the (name, value) pairs that differ from the
+    scenario that was solved, scenario is the full scenario with the options applied.
+    kill_chance is None when no hp was given.
+    '''
+    __slots__ = ()
+
+
+class Solution(namedtuple('Solution', ['choices', 'candidates', 'evaluated', 'pruned'])):
+    '''The best choices first, and how many of the candidates were evaluated or skipped.'''
+    __slots__ = ()
+
+    @property
+    def best(self):
+        return self.choices[0] if self.choices else None
+
+
+def _apply(scenario, choice):
+    #The scenario with a set of options applied on top of it
+    attack = scenario.attack_kwargs()
+    attack['bonus_damage'] += choice['bonus_damage']
+    for flag in ('impact', 'gwf', 'brutal_strikes'):
+        attack[flag] = attack[flag] or choice[flag]
+    return Scenario(scenario.advantage + choice['advantage'],
+                    scenario.help_dice + tuple(choice['help_dice']),
+                    scenario.mod + choice['to_hit'],
+                    attack,
+                    scenario.base)
+
+
+def _dominates(pool, other):
+    #True if pool rolls at least as high as other: as much advantage, and help dice that are
+    #at least as big when both are sorted from big to small
+    advantage, help_dice = pool
+    other_advantage, other_help = other
+    if advantage < other_advantage or len(help_dice) < len(other_help):
+        return False
+    return all(big >= small for big, small in zip(help_dice, other_help))
+
+
+def _best_help(choices):
+    #Help dice that dominate every choice: the biggest die at every position
+    choices = [tuple(sorted(dice, reverse = True)) for dice in choices]
+    size = max(len(dice) for dice in choices)
+    return tuple(max(dice[i] if i < len(dice) else 0 for dice in choices) for i in range(size))
+
+
+def solve(scenario, options, objective = 'expected_damage', hp = None, attacks = 1, top = 10,
+          max_changes = None, prune = True):
+    '''
+    Ranks every combination of options applied to scenario.
+    options maps option names from OPTIONS to lists of values to try, e.g.
+    {'to_hit': [0, 2], 'impact': [False, True], 'help_dice': [(), (6,)]}. to_hit, advantage,
+    help_dice and bonus_damage are added to the scenario, the damage options are switched on.
+    objective is 'expected_damage' or 'kill_chance', the chance that attacks attacks deal at
+    least hp damage. max_changes limits how many options can differ from their first value,
+    so max_changes = 1 compares single upgrades. Returns a Solution with the top choices.
+    '''
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}, use one of: {', '.join(OBJECTIVES)}")
+    if objective == 'kill_chance' and hp is None:
+        raise ValueError('The kill_chance objective needs hp')
+    unknown = set(options) - set(OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown options: {', '.join(sorted(unknown))}")
+
+    names = list(options)
+    values = [list(options[name]) for name in names]
+    if any(not choices for choices in values):
+        raise ValueError('Every option needs at least one value')
+
+    attack = scenario.attack_kwargs()
+    prune = prune and attack['type_adder'] >= 0 and attack['type_multiplier'] >= 0
+
+    #Group the candidates by dice pool, keeping the order they were listed in
+    pools = {}
+    for combination in itertools.product(*values):
+        changes = sum(value != choices[0] for value, choices in zip(combination, values))
+        if max_changes is not None and changes > max_changes:
+            continue
+        choice = {**OPTIONS, **dict(zip(names, combination))}
+        candidate = _apply(scenario, choice)
+        pool = (candidate.advantage, candidate.help_dice)
+        changed = tuple((name, value) for name, value, choices in zip(names, combination, values)
+                        if value != choices[0])
+        pools.setdefault(pool, []).append((changed, candidate))
+    candidates = sum(len(group) for group in pools.values())
+
+    #The best value of every option, used for the upper bound of a pool
+    best = {**OPTIONS, **{name: max(choices) for name, choices in zip(names, values)}}
+    if 'help_dice' in options:
+        best['help_dice'] = _best_help(values[names.index('help_dice')])
+    best_attack = _apply(scenario, best)
+
+    def score(result):
+        #The value to rank on, and the kill chance if there is an hp to kill.
+        #A single attack reads it straight from the damage pmf
+        if hp is None:
+            kill_chance = None
+        elif attacks == 1:
+            kill_chance = float(result.damage_pmf[max(hp - result.damage_offset, 0):].sum())
+        else:
+            kill_chance = turn_damage([result] * attacks).kill_chance(hp)
+        return (kill_chance if objective == 'kill_chance' else result.expected_damage), kill_chance
+
+    def flatten(pool):
+        advantage, help_dice = pool
+        dice = Scenario(advantage, help_dice, base = scenario.base).dice()
+        return damage.flatten_check(*check(dice, mod = 0, with_crit = True))
+
+    ranking = []
+    skipped = []
+    evaluated = pruned = 0
+    #Strong pools first, so the top results fill up with good candidates early
+    for pool in sorted(pools, key = lambda pool: (-pool[0], [-sides for sides in pool[1]], -len(pool[1]))):
+        group = pools[pool]
+        threshold = ranking[top - 1][0] if prune and len(ranking) >= top else None
+
+        if threshold is not None and any(_dominates(other, pool) for other in skipped):
+            pruned += len(group)
+            skipped.append(pool)
+            continue
+
+        rolls, probs, crit, fumble = flatten(pool)
+        if threshold is not None:
+            bound, _ = score(evaluate_rolls(rolls + best_attack.mod, probs, crit, fumble,
+                                            best_attack.attack_kwargs()))
+            if bound <= threshold:
+                pruned += len(group)
+                skipped.append(pool)
+                continue
+
+        for changed, candidate in group:
+            result = evaluate_rolls(rolls + candidate.mod, probs, crit, fumble, candidate.attack_kwargs())
+            value, kill_chance = score(result)
+            ranking.append((value, evaluated, Choice(changed, candidate, result.expected_damage, kill_chance)))
+            evaluated += 1
+        ranking.sort(key = lambda item: (-item[0], item[1]))
+        del ranking[top:]
+
+    return Solution([choice for _, _, choice in ranking], candidates, evaluated, pruned)
@@ -0,0 +1,143 @@
+'''
+Streaming scenario results to a file.
+
+result_rows() turns scenarios into flat result rows one at a time, and write_results()
+writes those rows in batches of a fixed size to a CSV, Parquet or Arrow file. Only one
+batch is held in memory at a time, so the size of the sweep doesn't matter.
+Parquet and Arrow output need pyarrow, which pandas uses for those formats.
+'''
+
+import itertools
+import json
+
+from .parallel import iter_results
+from .scenario import ATTACK_DEFAULTS
+
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+
+def scenario_row(scenario, result, with_pmf = False):
+    '''A flat dictionary with the parameters and results of a single scenario.'''
+    attack = scenario.attack_kwargs()
+    row = {'base': scenario.base,
+           'advantage': scenario.advantage,
+           'help_dice': ' '.join(f'd{sides}' for sides in scenario.help_dice),
+           'mod': scenario.mod}
+    row.update({name: attack[name] for name in ATTACK_DEFAULTS})
+
+    #type_multiplier can be an int or a float, keep it a float so every batch has the same columns,
+    #and the same for the flags, which could be given as 0 or 1
+    row['type_multiplier'] = float(row['type_multiplier'])
+    for name in ('impact', 'gwf', 'brutal_strikes'):
+        row[name] = bool(row[name])
+
+    row.update({'expected_damage': result.expected_damage,
+                'hit_chance': result.hit_chance,
+                'crit_chance': result.crit_chance,
+                'fumble_chance': result.fumble_chance})
+    if with_pmf:
+        row['damage_offset'] = result.damage_offset
+        row['damage_pmf'] = result.damage_pmf.tolist()
+    return row
+
+
+def result_rows(scenarios, with_pmf = False, workers = 1, chunksize = 1000):
+    '''
+    Yields one result row per scenario, in order. scenarios can be any iterable,
+    including a generator. workers and chunksize are passed on to iter_results().
+    '''
+    for scenario, result in iter_results(scenarios, workers = workers, chunksize = chunksize):
+        yield scenario_row(scenario, result, with_pmf = with_pmf)
+
+
+def batches(rows, batch_size):
+    '''Groups an iterable of rows into lists of at most batch_size rows.'''
+    rows = iter(rows)
+    return iter(lambda: list(itertools.islice(rows, batch_size)), [])
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.first = True
+
+    def write(self, frame):
+        if 'damage_pmf' in frame:
+            frame['damage_pmf'] = frame['damage_pmf'].map(json.dumps)
+        frame.to_csv(self.path, mode = 'w' if self.first else 'a', header = self.first, index = False)
+        self.first = False
+
+    def close(self):
+        pass
+
+
+class _ArrowWriter:
+    def __init__(self, path, file_format):
+        try:
+            import pyarrow
+        except ImportError as error:
+            raise ImportError(f'Writing {file_format} files needs pyarrow, install it with pip install pyarrow') from error
+
+        self.pyarrow = pyarrow
+        self.path = path
+        self.file_format = file_format
+        self.schema = None
+        self.writer = None
+
+    def write(self, frame):
+        if self.schema is None:
+            self.schema = self._schema(frame)
+        table = self.pyarrow.Table.from_pandas(frame, schema = self.schema, preserve_index = False)
+        if self.writer is None:
+            if self.file_format == 'parquet':
+                import pyarrow.parquet
+                self.writer = pyarrow.parquet.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = self.pyarrow.ipc.new_file(self.path, self.schema)
+        self.writer.write_table(table)
+
+    def _schema(self, frame):
+        #The schema is fixed by the first batch, so the numeric attack arguments are always
+        #float64: a later batch can have 0.5 where the first one only had whole numbers
+        schema = self.pyarrow.Schema.from_pandas(frame, preserve_index = False)
+        for name, default in ATTACK_DEFAULTS.items():
+            index = schema.get_field_index(name)
+            if index >= 0 and not isinstance(default, bool):
+                schema = schema.set(index, self.pyarrow.field(name, self.pyarrow.float64()))
+        return schema
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def write_results(rows, path, file_format = None, batch_size = 10000):
+    '''
+    Writes result rows to a file in batches of batch_size rows and returns the number of rows.
+    The format ('csv', 'parquet' or 'arrow') is taken from the file extension
+    unless file_format is given.
+    '''
+    import pandas as pd
+
+    if file_format is None:
+        extension = str(path)[str(path).rfind('.'):].lower()
+        if extension not in FORMATS:
+            raise ValueError(f"Can't tell the file format of {path}, use one of: {', '.join(FORMATS)}")
+        file_format = FORMATS[extension]
+
+    if file_format == 'csv':
+        writer = _CsvWriter(path)
+    elif file_format in ('parquet', 'arrow'):
+        writer = _ArrowWriter(path, file_format)
+    else:
+        raise ValueError(f'Unknown file format: {file_format}')
+
+    count = 0
+    try:
+        for batch in batches(rows, batch_size):
+            writer.write(pd.DataFrame(batch))
+            count += len(batch)
+    finally:
+        writer.close()
+
+    return count
@@ -0,0 +1,94 @@
+'''
+Evaluating attacks over whole grids of defense, modifier and dr values at once.
+
+Calling attack_outcomes() for every combination recomputes the same check over and over.
+Here the check is done once, and the damage for every roll and every grid point is
+worked out in one numpy pass. A modifier only moves the rolls up or down, so it is the
+same as lowering the defense by the same amount, which lets the modifier and the
+defense share a single axis.
+'''
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import damage
+from .core import check
+
+
+class SweepResult(namedtuple('SweepResult', ['defense', 'mod', 'dr', 'expected_damage', 'damage', 'pmf'])):
+    '''
+    The results of attack_sweep(). defense, mod, dr and expected_damage have one entry per
+    grid point. damage holds the possible damage values in order and pmf has one row per
+    grid point with the chance of each of those damage values.
+    '''
+    __slots__ = ()
+
+    def to_frame(self, with_pmf = False):
+        '''
+        Returns the results as a pandas DataFrame with one row per grid point.
+        With with_pmf set to true there is also a column per damage value.
+        '''
+        import pandas as pd
+
+        frame = pd.DataFrame({'defense': self.defense,
+                              'mod': self.mod,
+                              'dr': self.dr,
+                              'expected_damage': self.expected_damage})
+        if with_pmf:
+            pmf_columns = pd.DataFrame(self.pmf, columns = [f'damage_{value}' for value in self.damage])
+            frame = pd.concat([frame, pmf_columns], axis = 1)
+        return frame
+
+
+def grid(defense = 10, mod = 0, dr = 0):
+    '''
+    Every combination of the given defense, mod and dr values, as three flat arrays.
+    Each argument can be a single number or a list/range of numbers.
+    '''
+    axes = np.meshgrid(np.atleast_1d(defense), np.atleast_1d(mod), np.atleast_1d(dr), indexing = 'ij')
+    return tuple(axis.ravel().astype(np.int64) for axis in axes)
+
+
+def roll_arrays(*dice):
+    '''
+    Runs check() once without a modifier and flattens the result into arrays of rolls,
+    probabilities and crit/fumble flags (see damage.flatten_check).
+    '''
+    if isinstance (dice[0],tuple):
+        dice = dice[0]
+
+    normals, fumbles, crits = check(dice, mod = 0, with_crit = True)
+    return damage.flatten_check(normals, fumbles, crits)
+
+
+def attack_sweep(*dice, defense = 10, mod = 0, dr = 0, precision = 'float64', **attack):
+    '''
+    Calculates the damage pmf and expected damage of an attack for every combination of
+    defense, mod and dr. The other keyword arguments are the same as for attack_outcomes().
+    Unlike attack_outcomes() the probabilities are not rounded.
+    precision can be 'float64' or 'float32', float32 halves the memory of the pmf matrix.
+    Returns a SweepResult.
+    '''
+    if precision not in ('float64', 'float32'):
+        raise ValueError(f"attack_sweep only supports 'float64' and 'float32' precision, not {precision!r}")
+    rolls, probs, crit, fumble = roll_arrays(*dice)
+    defenses, mods, drs = grid(defense, mod, dr)
+
+    #One row per grid point, one column per roll
+    damage_matrix = damage.damage_matrix(rolls, defenses - mods, crit = crit, fumble = fumble,
+                                         dr = drs[:, None], **attack)
+
+    expected_damage = damage_matrix @ probs
+
+    #Add up the probabilities per grid point and damage value in a single bincount
+    #A negative type_adder can give negative damage, so the damage values start at the lowest one
+    lowest = min(int(damage_matrix.min(initial = 0)), 0)
+    width = int(damage_matrix.max(initial = 0)) - lowest + 1
+    points = len(defenses)
+    index = (np.arange(points)[:, None] * width + damage_matrix - lowest).ravel()
+    weights = np.broadcast_to(probs, damage_matrix.shape).ravel()
+    pmf = np.bincount(index, weights = weights, minlength = points * width).reshape(points, width)
+
+    return SweepResult(defenses, mods, drs, expected_damage.astype(precision),
+                       np.arange(lowest, lowest + width), pmf.astype(precision))
@@ -0,0 +1,116 @@
+'''
+The total damage of a turn with several attacks.
+
+Every attack has its own damage pmf. The damage of the whole turn is the sum of those,
+so its pmf is the convolution of the attack pmfs, just like adding dice together.
+Identical attacks are grouped and added with repeated squaring, so ten of the same
+attack only take a handful of convolutions.
+'''
+
+from collections import namedtuple
+
+import numpy as np
+
+from .scenario import Scenario, ScenarioResult, evaluate
+
+#Above this size np.convolve gets slower than going through the fft
+FFT_MIN_SIZE = 512
+
+
+class TurnResult(namedtuple('TurnResult', ['offset', 'pmf', 'expected_damage'])):
+    '''
+    The damage of a full turn. pmf is a numpy array with the chance of each total
+    damage, starting at offset.
+    '''
+    __slots__ = ()
+
+    def kill_chance(self, hp):
+        '''
+        The chance that the turn deals at least hp damage.
+        hp can be a single number or an array of numbers.
+        '''
+        #survival[i] is the chance of dealing offset + i damage or more
+        survival = np.append(np.cumsum(self.pmf[::-1])[::-1], 0.0)
+        index = np.clip(np.asarray(hp) - self.offset, 0, len(self.pmf))
+        result = survival[index]
+        return float(result) if np.ndim(result) == 0 else result
+
+    def to_dict(self):
+        '''The damage pmf as a {damage: probability} dictionary, leaving out impossible values.'''
+        return {self.offset + i: prob for i, prob in enumerate(self.pmf.tolist()) if prob}
+
+
+def damage_array(attack):
+    '''
+    Turns an attack into an (offset, pmf array) pair. An attack can be a damage pmf
+    dictionary from attack_outcomes, a Scenario or a ScenarioResult.
+    attack_outcomes rounds its pmf by default, use precision = 'float64' for unrounded values.
+    '''
+    if isinstance(attack, Scenario):
+        attack = evaluate(attack)
+    if isinstance(attack, ScenarioResult):
+        return attack.damage_offset, np.asarray(attack.damage_pmf, dtype = np.float64)
+
+    low = min(attack)
+    pmf = np.zeros(max(attack) - low + 1)
+    for damage, prob in attack.items():
+        pmf[damage - low] = float(prob)
+    return low, pmf
+
+
+def convolve_pmf(a, b):
+    '''Convolves two float pmf arrays, through the fft when both are wide.'''
+    if min(len(a), len(b)) < FFT_MIN_SIZE:
+        return np.convolve(a, b)
+
+    size = len(a) + len(b) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    result = np.fft.irfft(np.fft.rfft(a, fft_size) * np.fft.rfft(b, fft_size), fft_size)[:size]
+    #The fft can leave tiny negative values where the chance is 0
+    return np.maximum(result, 0.0)
+
+
+def _power(offset, pmf, n):
+    #n copies of the same attack with repeated squaring
+    result_offset, result = 0, np.ones(1)
+    while n:
+        if n & 1:
+            result_offset, result = result_offset + offset, convolve_pmf(result, pmf)
+        n >>= 1
+        if n:
+            offset, pmf = offset * 2, convolve_pmf(pmf, pmf)
+    return result_offset, result
+
+
+def _attack_key(attack):
+    if isinstance(attack, dict):
+        return tuple(attack.items())
+    if isinstance(attack, ScenarioResult):
+        return ('result', attack.damage_offset, attack.damage_pmf.tobytes())
+    return attack
+
+
+def turn_damage(*attacks):
+    '''
+    The total damage pmf of a turn in which all the given attacks are made.
+    Returns a TurnResult with the pmf, the expected damage and kill_chance().
+    '''
+    #Only a real list or tuple of attacks is unpacked, Scenario and ScenarioResult are namedtuples themselves
+    if len(attacks) == 1 and type(attacks[0]) in (list, tuple):
+        attacks = tuple(attacks[0])
+
+    groups = {}
+    for attack in attacks:
+        key = _attack_key(attack)
+        if key in groups:
+            groups[key][1] += 1
+        else:
+            groups[key] = [attack, 1]
+
+    offset, pmf = 0, np.ones(1)
+    for attack, copies in groups.values():
+        group_offset, group_pmf = _power(*damage_array(attack), copies)
+        offset, pmf = offset + group_offset, convolve_pmf(pmf, group_pmf)
+
+    expected_damage = float(np.arange(offset, offset + len(pmf)) @ pmf)
+    return TurnResult(offset, pmf, expected_damage)
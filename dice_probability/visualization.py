@@ -1,9 +1,48 @@
 # visualization.py
-import matplotlib.pyplot as plt
-import streamlit as st
+# matplotlib, streamlit and pandas take seconds to import, so they are only
+# imported by the functions that use them. The curve math only needs numpy.
+import io
 import numpy as np
-import pandas as pd
 
+from .instrument import instrumented
+
+@instrumented
+def calculate_curves(distribution, exact=False):
+    """
+    Calculate the PMF, the "≥ X" survival curve and the "≤ X" CDF in one pass.
+    
+    Args:
+        distribution (dict): Dictionary of {outcome: probability}, or of
+            {outcome: occurrences} when exact is True
+        exact (bool): Treat the values as integer occurrences and only divide
+            by the total at the very end, so no rounding error builds up
+    
+    Returns:
+        tuple: (outcomes, pmf, survival, cdf) as numpy arrays
+    """
+    # Sort by outcome
+    sorted_items = sorted(distribution.items())
+    outcomes = np.array([outcome for outcome, _ in sorted_items])
+    values = [value for _, value in sorted_items]
+    
+    if exact:
+        # Python ints never overflow, numpy only needs to add them up
+        counts = np.array(values, dtype=object)
+        total = sum(values)
+        cdf = np.cumsum(counts)
+        survival = np.cumsum(counts[::-1])[::-1]
+        return (outcomes,
+                (counts / total).astype(float),
+                (survival / total).astype(float),
+                (cdf / total).astype(float))
+    
+    pmf = np.array(values, dtype=float)
+    # Reverse cumulative sum: probability of rolling >= X for every X at once
+    survival = np.cumsum(pmf[::-1])[::-1]
+    cdf = np.cumsum(pmf)
+    return outcomes, pmf, survival, cdf
+
+@instrumented
 def calculate_cdf(probabilities):
     """
     Calculate the cumulative distribution function from a probability dictionary.
@@ -14,18 +53,10 @@ def calculate_cdf(probabilities):
     Returns:
         tuple: (sorted outcomes, probabilities, cdf values)
     """
-    # Sort by outcome
-    sorted_probs = dict(sorted(probabilities.items()))
-    outcomes = list(sorted_probs.keys())
-    probs = list(sorted_probs.values())
-    
-    # Calculate CDF (probability of rolling >= X)
-    cdf = []
-    for i in range(len(outcomes)):
-        # Sum all probabilities for outcomes >= current outcome
-        cdf.append(sum(probs[i:]))
+    outcomes, pmf, survival, _ = calculate_curves(probabilities)
     
-    return outcomes, probs, cdf
+    # The cdf here is the probability of rolling >= X
+    return outcomes.tolist(), pmf.tolist(), survival.tolist()
 
 def apply_modifier(probabilities, modifier=0):
     """
@@ -42,16 +73,19 @@ def apply_modifier(probabilities, modifier=0):
         return probabilities
     return {k + modifier: v for k, v in probabilities.items()}
 
+@instrumented
 def plot_dice_analysis(probabilities, title="Dice Roll Analysis", 
-                      modifier=0, figsize=(12, 10)):
+                      modifier=0, figsize=(12, 10), exact=False):
     """
     Create a clean visualization with both PMF and CDF, including modifier.
     
     Args:
-        probabilities (dict): Dictionary of {outcome: probability}
+        probabilities (dict): Dictionary of {outcome: probability}, or of
+            {outcome: occurrences} when exact is True
         title (str): Chart title
         modifier (int): Flat modifier added to rolls
         figsize (tuple): Figure size
+        exact (bool): Passed on to calculate_curves
     
     Returns:
         tuple: (figure, sorted_probabilities, cdf_values)
@@ -60,7 +94,10 @@ def plot_dice_analysis(probabilities, title="Dice Roll Analysis",
     probabilities = apply_modifier(probabilities, modifier)
     
     # Calculate probability distributions
-    outcomes, probs, cdf = calculate_cdf(probabilities)
+    outcomes, probs, survival, _ = calculate_curves(probabilities, exact=exact)
+    outcomes, probs, cdf = outcomes.tolist(), probs.tolist(), survival.tolist()
+    
+    import matplotlib.pyplot as plt
     
     # Create figure with two subplots
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=figsize, gridspec_kw={'height_ratios': [1, 1]})
@@ -69,14 +106,10 @@ def plot_dice_analysis(probabilities, title="Dice Roll Analysis",
     bars = ax1.bar(outcomes, probs, color='#3498db', alpha=0.8, width=0.8)
     
     # Add value labels more carefully - black text above bars
+    # Only label bars that are tall enough, all labels are added in a single call
     max_prob = max(probs)
-    for bar in bars:
-        height = bar.get_height()
-        # Only add text if the bar is tall enough
-        if height > max_prob * 0.05:  # Skip very small values
-            ax1.text(bar.get_x() + bar.get_width()/2., height + (max_prob * 0.02),
-                    f'{height:.3f}', ha='center', va='bottom', 
-                    color='black', fontsize=9)
+    labels = [f'{p:.3f}' if p > max_prob * 0.05 else '' for p in probs]
+    ax1.bar_label(bars, labels=labels, padding=3, color='black', fontsize=9)
     
     # Cleaner grid and styling
     ax1.grid(axis='y', linestyle='-', alpha=0.2)
@@ -109,27 +142,51 @@ def plot_dice_analysis(probabilities, title="Dice Roll Analysis",
     plt.tight_layout(pad=3.0)
     return fig, dict(zip(outcomes, probs)), cdf
 
-def create_probability_table(outcomes, probs, cdf):
+@instrumented
+def create_probability_table(outcomes, probs, cdf, at_most=None):
     """
     Create a DataFrame containing probability data.
     
     Args:
         outcomes (list): List of roll outcomes
         probs (list): List of probabilities
-        cdf (list): List of cumulative probabilities
+        cdf (list): List of cumulative probabilities (≥ X)
+        at_most (list): Optional list of probabilities of rolling ≤ X
         
     Returns:
         pandas.DataFrame: Formatted probability table
     """
+    import pandas as pd
+    
     data = {
         "Roll Result": outcomes,
         "Probability": [f"{p:.3f}" for p in probs],
         "Success Rate (≥)": [f"{c:.3f}" for c in cdf]
     }
+    if at_most is not None:
+        data["At Most (≤)"] = [f"{c:.3f}" for c in at_most]
     
     return pd.DataFrame(data)
 
-def display_analysis(probabilities, title="Dice Roll Analysis", modifier=0):
+def figure_to_png(fig):
+    """
+    Render a figure to PNG bytes and close it, so it can be cached and shown later.
+    
+    Args:
+        fig (matplotlib.figure.Figure): Figure to render
+        
+    Returns:
+        bytes: PNG image data
+    """
+    import matplotlib.pyplot as plt
+    
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
+
+def display_analysis(probabilities, title="Dice Roll Analysis", modifier=0,
+                     image=None, table=None):
     """
     Display improved dice analysis in Streamlit with probability table.
     
@@ -137,19 +194,29 @@ def display_analysis(probabilities, title="Dice Roll Analysis", modifier=0):
         probabilities (dict): Dictionary of {outcome: probability}
         title (str): Chart title
         modifier (int): Flat modifier added to rolls
+        image (bytes): Optional PNG of the chart that was already rendered
+        table (pandas.DataFrame): Optional probability table that was already built
     """
-    # Generate the visualization and get the data
-    fig, sorted_probs, cdf_values = plot_dice_analysis(probabilities, title, modifier)
-    
-    # Display the chart
-    st.pyplot(fig)
+    import matplotlib.pyplot as plt
+    import streamlit as st
+    
+    if image is not None:
+        st.image(image)
+    else:
+        # Generate the visualization and get the data
+        fig, _, _ = plot_dice_analysis(probabilities, title, modifier)
+        
+        # Display the chart
+        st.pyplot(fig)
+        plt.close(fig)
     
-    # Create a DataFrame for the probability table
-    outcomes = list(sorted_probs.keys())
-    probs = list(sorted_probs.values())
+    if table is None:
+        # Create a DataFrame for the probability table
+        outcomes, probs, survival, at_most = calculate_curves(
+            apply_modifier(probabilities, modifier))
+        table = create_probability_table(outcomes, probs, survival, at_most)
     
-    # Create and display the table
-    df = create_probability_table(outcomes, probs, cdf_values)
+    # Display the table
     st.subheader("Probability Table")
-    table_height = min(len(df) * 35 + 38, 500)
-    st.dataframe(df, hide_index=True, height=table_height)
\ No newline at end of file
+    table_height = min(len(table) * 35 + 38, 500)
+    st.dataframe(table, hide_index=True, height=table_height)
\ No newline at end of file
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from dice_probability import cli
+from dice_probability.scenario import Scenario
+
+
+def test_attack_values_get_the_type_of_their_default():
+    scenario = cli.parse_scenario({'help_dice': 'd8 d6', 'impact': 1, 'gwf': 'yes', 'defense': 12.0})
+    attack = scenario.attack_kwargs()
+    assert attack['impact'] is True
+    assert attack['gwf'] is True
+    assert attack['defense'] == 12 and isinstance(attack['defense'], int)
+    assert scenario == Scenario(0, (8, 6), 0, {'impact': True, 'gwf': True, 'defense': 12})
+
+
+def test_invalid_attack_values_raise():
+    with pytest.raises(ValueError):
+        cli.parse_scenario({'attack': {'defense': [1]}})
+    with pytest.raises(ValueError):
+        cli.parse_scenario({'impact': 'maybe'})
+
+
+def test_unknown_output_format_fails_before_evaluating(tmp_path, monkeypatch):
+    scenarios = tmp_path / 'scenarios.json'
+    scenarios.write_text(json.dumps([{'advantage': 1}]))
+    monkeypatch.setattr(cli, 'run', lambda *args, **kwargs: pytest.fail('scenarios were evaluated'))
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main([str(scenarios), '-o', str(tmp_path / 'results.txt'), '-q'])
+    assert exit_info.value.code == 1
+
+
+def test_mixed_flag_types_write_one_column(tmp_path):
+    pd = pytest.importorskip('pandas')
+    scenarios = tmp_path / 'scenarios.json'
+    scenarios.write_text(json.dumps([{'attack': {'impact': 1}}, {}]))
+    output = tmp_path / 'results.csv'
+
+    cli.main([str(scenarios), '-o', str(output), '-q'])
+    assert pd.read_csv(output)['impact'].tolist() == [True, False]
@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+import pytest
+
+from dice_probability.core import damage_per_outcome
+from dice_probability.damage import damage_matrix
+
+ATTACK_OPTIONS = {'base_damage': lambda rng: rng.randint(0, 6),
+                  'bonus_damage': lambda rng: rng.randint(-2, 4),
+                  'impact': lambda rng: rng.random() < 0.5,
+                  'dr': lambda rng: rng.randint(0, 5),
+                  'bonus_reduction': lambda rng: rng.randint(0, 3),
+                  'type_multiplier': lambda rng: rng.choice([1, 2, 0.5, 1.5, 0, 0.25]),
+                  'type_adder': lambda rng: rng.randint(-3, 3),
+                  'gwf': lambda rng: rng.random() < 0.5,
+                  'brutal_strikes': lambda rng: rng.random() < 0.5}
+
+
+def random_case(rng):
+    attack = {name: option(rng) for name, option in ATTACK_OPTIONS.items() if rng.random() < 0.6}
+    rolls = sorted(rng.sample(range(-5, 60), rng.randint(1, 30)))
+    defenses = [rng.randint(0, 30) for _ in range(rng.randint(1, 6))]
+    return attack, rolls, defenses
+
+
+def test_defaults_match_scalar():
+    assert damage_matrix().tolist() == [list(damage_per_outcome().values())]
+    assert damage_matrix(crit = True).tolist() == [list(damage_per_outcome(crit = True).values())]
+    assert damage_matrix(fumble = True).tolist() == [list(damage_per_outcome(fumble = True).values())]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_scalar_with_single_flags(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        attack, rolls, defenses = random_case(rng)
+        crit, fumble = rng.random() < 0.3, rng.random() < 0.15
+
+        matrix = damage_matrix(rolls, defenses, crit = crit, fumble = fumble, **attack)
+        assert matrix.shape == (len(defenses), len(rolls))
+        for row, defense in zip(matrix.tolist(), defenses):
+            expected = damage_per_outcome(rolls = rolls, defense = defense, crit = crit, fumble = fumble, **attack)
+            assert row == [expected[roll] for roll in rolls]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_scalar_with_flag_per_roll(seed):
+    rng = random.Random(1000 + seed)
+    for _ in range(50):
+        attack, rolls, defenses = random_case(rng)
+        crit = np.array([rng.random() < 0.3 for _ in rolls])
+        fumble = np.array([rng.random() < 0.2 for _ in rolls])
+
+        matrix = damage_matrix(rolls, defenses, crit = crit, fumble = fumble, **attack)
+        for i, defense in enumerate(defenses):
+            for j, roll in enumerate(rolls):
+                expected = damage_per_outcome(rolls = [roll], defense = defense, crit = bool(crit[j]),
+                                              fumble = bool(fumble[j]), **attack)
+                assert matrix[i, j] == expected[roll]
@@ -0,0 +1,49 @@
+import pytest
+
+from dice_probability.core import Adv, check, d4, d6, d8, d20, disAdv, keep_highest, keep_lowest
+from dice_probability.expression import compile_expression, normalize, roll_pmf
+
+
+def assert_same(result, expected):
+    assert len(result) == len(expected)
+    for sub_result, sub_expected in zip(result, expected):
+        assert sub_result.keys() == sub_expected.keys()
+        for roll, prob in sub_expected.items():
+            assert sub_result[roll] == pytest.approx(prob, abs = 1e-12)
+
+
+@pytest.mark.parametrize('expression, dice, mod', [
+    ('d20 adv2 + 2d8 + d4 + 5', (Adv(d20, 3), d8, d8, d4), 5),
+    ('d20+d8', (d20, d8), 0),
+    ('  D20   DIS +\td6 - 2 ', (disAdv(d20), d6), -2),
+    ('d20 + 10', (d20,), 10),
+])
+def test_matches_check(expression, dice, mod):
+    assert_same(compile_expression(expression).check(), check(dice, mod = mod))
+
+
+def test_keep_and_drop():
+    assert_same([roll_pmf('4d6kh3')], [check(keep_highest(d6, 4, 3), mod = 0, with_crit = False)[0]])
+    assert_same([roll_pmf('4d6dl1')], [roll_pmf('4d6kh3')])
+    assert_same([roll_pmf('3d8kl2 + 1')], [check(keep_lowest(d8, 3, 2), mod = 1, with_crit = False)[0]])
+
+
+def test_subtraction():
+    result = roll_pmf('d20 - d4 - 1')
+    assert min(result) == 1 - 4 - 1
+    assert max(result) == 20 - 1 - 1
+    assert result[10] == pytest.approx(4 / 80)
+    assert sum(result.values()) == pytest.approx(1)
+
+
+def test_whitespace_inside_terms_is_not_joined():
+    assert normalize('d20 + 5') == normalize('d20+5') == '+d20+5'
+    assert normalize('10d6') == '+10d6'
+    assert normalize('d20 adv2 + 4d6 kh3') == '+d20adv2+4d6kh3'
+
+
+@pytest.mark.parametrize('expression', ['d20 5', '1 0d6', 'd20 d8', 'd20 adv 2', 'd20 + 2 kh1',
+                                        'd20d6', 'd20 ++ 5', 'd20 +', '5 + x', ''])
+def test_rejected(expression):
+    with pytest.raises(ValueError):
+        roll_pmf(expression)
@@ -0,0 +1,47 @@
+import itertools
+import math
+
+import pytest
+
+from dice_probability import engine
+from dice_probability.core import keep_highest, keep_lowest
+
+#Non-uniform dice with negative rolls and faces that have no occurences,
+#in the middle as well as at the ends
+DICE = [{-2: 1, 0: 2, 1: 0, 3: 1},
+        {-1: 3, 2: 1},
+        {0: 0, 1: 1, 2: 2, 4: 0},
+        {-3: 2, 4: 1, 5: 0},
+        {2: 3}]
+
+SIZES = [(n, k) for n in range(1, 5) for k in range(1, n + 1)]
+
+
+def brute_force(die, n, k, highest):
+    #Every way to roll n dice, keeping the k highest or lowest
+    result = {}
+    for rolls in itertools.product(die.items(), repeat = n):
+        occ = math.prod(weight for _, weight in rolls)
+        if not occ:
+            continue
+        kept = sorted((roll for roll, _ in rolls), reverse = highest)[:k]
+        result[sum(kept)] = result.get(sum(kept), 0) + occ
+    return result
+
+
+def nonzero(die):
+    return {roll: occ for roll, occ in die.items() if occ}
+
+
+@pytest.mark.parametrize('die', DICE)
+@pytest.mark.parametrize('n, k', SIZES)
+@pytest.mark.parametrize('highest', [True, False])
+def test_matches_brute_force(die, n, k, highest):
+    expected = brute_force(die, n, k, highest)
+    keep = keep_highest if highest else keep_lowest
+    assert nonzero(keep(die, n = n, k = k)) == expected
+
+    engine_keep = engine.keep_highest if highest else engine.keep_lowest
+    result = engine.from_array(*engine_keep(engine.to_array(die), n, k))
+    assert nonzero(result) == expected
+    assert all(type(occ) is int for occ in result.values())
@@ -0,0 +1,49 @@
+from fractions import Fraction
+
+import pytest
+
+from dice_probability.core import Adv, attack_outcomes, d6, d8, d20, many_dice
+
+
+def add_dicts(first, second):
+    #The dictionary loop many_dice used before it worked on arrays
+    result = {}
+    for roll_a, value_a in first.items():
+        for roll_b, value_b in second.items():
+            result[roll_a + roll_b] = result.get(roll_a + roll_b, 0) + value_a * value_b
+    return result
+
+
+def test_occurences_stay_exact_integers():
+    result = many_dice(d20, d8, d8)[0]
+    assert result == add_dicts(add_dicts(d20, d8), d8)
+    assert all(type(occ) is int for occ in result.values())
+
+
+@pytest.mark.parametrize('precision', ['float', 'float64', 'exact'])
+def test_probability_dictionaries_are_not_truncated(precision):
+    pmf = attack_outcomes(d20, d8, defense = 12, precision = precision)
+    result = many_dice(pmf, pmf)[0]
+    expected = add_dicts(pmf, pmf)
+
+    assert result.keys() == expected.keys()
+    assert result[0] == pytest.approx(0.1056, abs = 1e-4)
+    for damage, prob in expected.items():
+        assert result[damage] == pytest.approx(prob, abs = 1e-12)
+    if precision == 'exact':
+        assert result == expected
+        assert all(isinstance(prob, Fraction) for prob in result.values())
+
+
+def test_probabilities_with_crit_and_mixed_dice():
+    pmf = attack_outcomes(Adv(d20), d6, defense = 14)
+    normals, fumbles, crits = many_dice(pmf, d8, with_crit = True)
+    combined = {}
+    for sub_pmf in (normals, fumbles, crits):
+        for roll, prob in sub_pmf.items():
+            combined[roll] = combined.get(roll, 0) + prob
+
+    expected = add_dicts(pmf, d8)
+    assert combined.keys() == expected.keys()
+    for roll, prob in expected.items():
+        assert combined[roll] == pytest.approx(prob, abs = 1e-12)
@@ -0,0 +1,28 @@
+import pytest
+
+from dice_probability.montecarlo import simulate, simulate_parallel
+from dice_probability.scenario import Scenario, evaluate
+
+SCENARIOS = [Scenario(),
+             Scenario(2, (8,), 3, {'defense': 15, 'dr': 2, 'impact': True}),
+             Scenario(-1, (6, 4), 1, {'defense': 12, 'gwf': True, 'brutal_strikes': True}),
+             Scenario(1, (8, 8), 0, {'defense': 18, 'base_damage': 3, 'type_multiplier': 0.5})]
+
+STATISTICS = ('expected_damage', 'hit_chance', 'crit_chance', 'fumble_chance')
+
+
+@pytest.mark.parametrize('seed, scenario', list(enumerate(SCENARIOS)))
+def test_simulation_agrees_with_exact_engine(seed, scenario):
+    exact = evaluate(scenario)
+    result = simulate(scenario, 200_000, seed = seed)
+    for name in STATISTICS:
+        low, high = result.interval(name, 0.999)
+        assert low <= getattr(exact, name) <= high, name
+
+
+def test_parallel_simulation_is_reproducible():
+    scenario = SCENARIOS[1]
+    first = simulate_parallel(scenario, 100_000, seed = 42, workers = 2)
+    second = simulate_parallel(scenario, 100_000, seed = 42, workers = 2)
+    assert first == second
+    assert first.n == 100_000
@@ -0,0 +1,105 @@
+import random
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from dice_probability import engine
+from dice_probability.core import Adv, check, create_die, d20, disAdv
+from dice_probability.pool import DicePool
+
+
+def base_die(advantage):
+    if advantage > 0:
+        return Adv(d20, advantage + 1)
+    if advantage < 0:
+        return disAdv(d20, -advantage + 1)
+    return d20
+
+
+def assert_same(result, expected):
+    for sub_result, sub_expected in zip(result, expected):
+        assert sub_result.keys() == sub_expected.keys()
+        for roll, prob in sub_expected.items():
+            assert sub_result[roll] == pytest.approx(prob, abs = 1e-12)
+
+
+@pytest.mark.parametrize('b', [[1, 1, 1, 1], [1], [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]])
+def test_deconvolve_regular_die(b):
+    x = np.array([3, 0, 1, 4, 1, 5, 9, 2], dtype = np.int64)
+    b = np.array(b, dtype = np.int64)
+    a = engine.convolve(x, b)
+    assert engine.deconvolve(a, b).tolist() == x.tolist()
+
+
+@pytest.mark.parametrize('b', [[1, 3, 3, 1], [2, 0, 1], [5], [1, 0, 0, 4]])
+def test_deconvolve_long_division(b):
+    x = np.array([1, 2, 0, 7, 1, 8, 2], dtype = np.int64)
+    b = np.array(b, dtype = np.int64)
+    a = engine.convolve(x, b)
+    assert engine.deconvolve(a, b).tolist() == x.tolist()
+
+
+@pytest.mark.parametrize('b', [[1, 1, 1], [1, 2, 1]])
+def test_deconvolve_object_dtype(b):
+    #Counts that don't fit in an int64
+    x = np.array([10 ** 20, 3, 10 ** 25, 0, 7], dtype = object)
+    b = np.array(b, dtype = object)
+    a = engine.convolve(x, b)
+    assert a.dtype == object
+    result = engine.deconvolve(a, b)
+    assert result.tolist() == x.tolist()
+    assert all(type(occ) is int for occ in result.tolist())
+
+
+@pytest.mark.parametrize('a, b', [([1, 2, 3, 2, 1], [1, 1, 1, 1]),
+                                  ([1, 1, 1], [1, 1]),
+                                  ([1, 2, 1], [2, 1]),
+                                  ([1, 3, 3, 2], [1, 2, 1]),
+                                  ([1, 1], [1, 1, 1]),
+                                  ([1, 1, 1], [0, 1])])
+def test_deconvolve_die_not_in_pool(a, b):
+    with pytest.raises(ValueError):
+        engine.deconvolve(np.array(a, dtype = np.int64), np.array(b, dtype = np.int64))
+
+
+def test_remove_die_not_in_pool():
+    pool = DicePool(1, [8, 6])
+    with pytest.raises(ValueError, match = 'no d4'):
+        pool.remove_die(4)
+    pool.remove_die(8)
+    with pytest.raises(ValueError, match = 'no d8'):
+        pool.remove_die(8)
+    assert pool.help_dice == (6,)
+
+
+def test_object_dtype_pool():
+    #20 ** 16 occurences for the base die alone, too much for an int64
+    pool = DicePool(15, [20, 12, 8])
+    assert pool.distribution().counts.dtype == object
+    pool.remove_die(12).add_die(4).remove_die(20)
+    expected = check(base_die(15), create_die(8), create_die(4), mod = 2, precision = 'exact')
+    result = pool.check(mod = 2, precision = 'exact')
+    assert result == expected
+    assert all(isinstance(prob, Fraction) for sub_pmf in result for prob in sub_pmf.values())
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('with_crit', [True, False])
+def test_matches_check_after_changes(seed, with_crit):
+    rng = random.Random(seed)
+    pool = DicePool(rng.randint(-2, 2), [rng.choice((4, 6, 8)) for _ in range(rng.randint(0, 2))],
+                    with_crit = with_crit)
+    for _ in range(12):
+        action = rng.choice(('add', 'remove', 'advantage'))
+        if action == 'add':
+            pool.add_die(rng.choice((4, 6, 8, 10, 12)))
+        elif action == 'remove' and pool.help_dice:
+            pool.remove_die(rng.choice(pool.help_dice))
+        else:
+            pool.set_advantage(rng.randint(-3, 3))
+
+        mod = rng.randint(-2, 5)
+        dice = (base_die(pool.advantage),) + tuple(create_die(sides) for sides in pool.help_dice)
+        expected = check(dice, mod = mod, with_crit = with_crit)
+        assert_same(pool.check(mod = mod), expected)
@@ -0,0 +1,67 @@
+from fractions import Fraction
+
+import pytest
+
+from dice_probability.core import Adv, attack_outcomes, check, d4, d6, d8, d20, die_probs, many_dice
+
+POOLS = [(d20,), (Adv(d20, 3), d8), (d20, d8, d6, d4), (Adv(d20, 2),) + (d6,) * 6]
+TOLERANCES = {'float64': 1e-12, 'float32': 1e-6}
+
+
+def assert_close(pmf, exact, tolerance):
+    assert list(pmf) == list(exact)
+    for roll, prob in exact.items():
+        assert abs(pmf[roll] - prob) <= tolerance
+
+
+@pytest.mark.parametrize('precision', TOLERANCES)
+@pytest.mark.parametrize('dice', POOLS)
+def test_die_probs_agrees_with_exact(dice, precision):
+    occurences = many_dice(dice, with_crit = True)
+    exact = die_probs(occurences, precision = 'exact')
+    assert all(isinstance(prob, Fraction) for sub_pmf in exact for prob in sub_pmf.values())
+    for sub_pmf, sub_exact in zip(die_probs(occurences, precision = precision), exact):
+        assert_close(sub_pmf, sub_exact, TOLERANCES[precision])
+
+
+@pytest.mark.parametrize('precision', TOLERANCES)
+@pytest.mark.parametrize('dice', POOLS)
+def test_check_agrees_with_exact(dice, precision):
+    exact = check(dice, mod = 3, precision = 'exact')
+    for sub_pmf, sub_exact in zip(check(dice, mod = 3, precision = precision), exact):
+        assert_close(sub_pmf, sub_exact, TOLERANCES[precision])
+
+
+@pytest.mark.parametrize('precision', TOLERANCES)
+@pytest.mark.parametrize('dice', POOLS)
+def test_attack_outcomes_agrees_with_exact(dice, precision):
+    attack = dict(mod = 2, defense = 15, dr = 1, impact = True, gwf = True)
+    exact = attack_outcomes(dice, precision = 'exact', **attack)
+    assert_close(attack_outcomes(dice, precision = precision, **attack), exact, TOLERANCES[precision])
+
+
+@pytest.mark.parametrize('dice', POOLS)
+def test_float_is_unchanged(dice):
+    occurences = many_dice(dice)[0]
+    total = sum(occurences.values())
+    assert die_probs(occurences) == {roll: occ / total for roll, occ in occurences.items()}
+    assert check(dice, mod = 1) == check(dice, mod = 1, precision = 'float')
+
+    #attack_outcomes keeps rounding to 4 decimals by default
+    pmf = attack_outcomes(dice, defense = 12)
+    assert pmf == attack_outcomes(dice, defense = 12, precision = 'float')
+    assert all(round(prob, 4) == prob for prob in pmf.values())
+    exact = attack_outcomes(dice, defense = 12, precision = 'exact')
+    assert all(abs(pmf[damage] - prob) <= 5e-5 + 1e-12 for damage, prob in exact.items())
+
+
+def test_known_attack_outcomes():
+    assert attack_outcomes(d20) == {0: 0.45, 1: 0.25, 2: 0.25, 5: 0.05}
+
+
+@pytest.mark.parametrize('function, args', [(die_probs, ({1: 1, 2: 1},)),
+                                            (check, ((d20,),)),
+                                            (attack_outcomes, ((d20,),))])
+def test_unknown_precision_raises(function, args):
+    with pytest.raises(ValueError):
+        function(*args, precision = 'float16')
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from dice_probability.core import check
+from dice_probability.scenario import Scenario
+from dice_probability.server import DiceServer, parse_query
+
+
+@pytest.mark.parametrize('body', [b'{"attack": {"defense": [1]}}',
+                                  b'{"attack": {"impact": {"a": 1}}}',
+                                  b'{"attack": [1]}',
+                                  b'{"help_dice": [[8]]}',
+                                  b'{"unknown": 1}',
+                                  b'{"precision": "float16"}',
+                                  b'[1]',
+                                  b'not json'])
+def test_invalid_queries_raise_value_error(body):
+    with pytest.raises(ValueError):
+        parse_query(body)
+
+
+def test_invalid_attack_value_is_a_bad_request():
+    async def respond():
+        server = DiceServer(workers = 1)
+        try:
+            return await server.respond('POST', '/check', b'{"attack": {"defense": [1]}}')
+        finally:
+            server.executor.shutdown()
+
+    status, response = asyncio.run(respond())
+    assert status == 400
+    assert 'defense' in response['error']
+
+
+def test_identical_queries_are_coalesced():
+    async def query():
+        server = DiceServer(workers = 2)
+        try:
+            scenario = Scenario(2, (8, 6), 3)
+            results = await asyncio.gather(*(server.query('/check', scenario) for _ in range(5)))
+            return server.stats, results
+        finally:
+            server.executor.shutdown()
+
+    stats, results = asyncio.run(query())
+    assert stats['requests'] == 5 and stats['calculated'] == 1 and stats['coalesced'] == 4
+    normals, fumbles, crits = check(Scenario(2, (8, 6), 3).dice(), mod = 3)
+    assert all(result == {'normals': normals, 'fumbles': fumbles, 'crits': crits} for result in results)
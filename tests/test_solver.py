@@ -0,0 +1,35 @@
+import pytest
+
+from dice_probability.scenario import Scenario, evaluate
+from dice_probability.solver import solve
+
+OPTIONS = {'to_hit': [0, 1, 2],
+           'advantage': [0, 1],
+           'help_dice': [(), (4,), (6,), (8, 4)],
+           'impact': [False, True],
+           'gwf': [False, True],
+           'brutal_strikes': [False, True]}
+
+
+@pytest.mark.parametrize('attacks', [1, 2])
+@pytest.mark.parametrize('objective', ['expected_damage', 'kill_chance'])
+def test_pruned_ranking_matches_exhaustive(objective, attacks):
+    scenario = Scenario(0, (), 3, {'defense': 15, 'dr': 2})
+    kwargs = dict(objective = objective, hp = 6, attacks = attacks, top = 5)
+
+    pruned = solve(scenario, OPTIONS, **kwargs)
+    exhaustive = solve(scenario, OPTIONS, prune = False, **kwargs)
+
+    assert [choice.scenario for choice in pruned.choices] == [choice.scenario for choice in exhaustive.choices]
+    assert pruned.evaluated + pruned.pruned == pruned.candidates
+
+
+def test_single_attack_kill_chance():
+    scenario = Scenario()
+    solution = solve(scenario, {'to_hit': [0, 2]}, objective = 'kill_chance', hp = 3)
+
+    best = solution.best
+    result = evaluate(best.scenario)
+    expected = result.damage_pmf[3 - result.damage_offset:].sum()
+    assert best.kill_chance == pytest.approx(expected)
+    assert best.expected_damage == pytest.approx(result.expected_damage)
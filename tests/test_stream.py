@@ -0,0 +1,36 @@
+import pytest
+
+from dice_probability.scenario import Scenario
+from dice_probability.stream import result_rows, write_results
+
+#Whole numbers first, so the first batch alone would make the attack columns integers
+SCENARIOS = [Scenario(0, (8,), 2, {'defense': 12}),
+             Scenario(1, (), 3, {'defense': 14, 'dr': 1, 'impact': True}),
+             Scenario(0, (6,), 1, {'defense': 12.5, 'type_adder': 0.5, 'dr': 1.5,
+                                   'bonus_damage': 0.5, 'base_damage': 1.5}),
+             Scenario(-1, (4,), 0, {'type_multiplier': 2})]
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'arrow'])
+def test_fractional_values_in_later_batches(tmp_path, extension):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    path = tmp_path / f'results.{extension}'
+
+    count = write_results(result_rows(SCENARIOS), str(path), batch_size = 1)
+    assert count == len(SCENARIOS)
+
+    frame = pd.read_parquet(path) if extension == 'parquet' else pd.read_feather(path)
+    assert frame['type_adder'].tolist() == [0, 0, 0.5, 0]
+    assert frame['defense'].tolist() == [12, 14, 12.5, 10]
+    assert frame['impact'].tolist() == [False, True, False, False]
+
+
+def test_csv_batches(tmp_path):
+    pd = pytest.importorskip('pandas')
+    path = tmp_path / 'results.csv'
+
+    write_results(result_rows(SCENARIOS), str(path), batch_size = 1)
+    frame = pd.read_csv(path)
+    assert len(frame) == len(SCENARIOS)
+    assert frame['dr'].tolist() == [0, 1, 1.5, 0]
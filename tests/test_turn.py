@@ -0,0 +1,17 @@
+from dice_probability.scenario import Scenario, evaluate
+from dice_probability.turn import turn_damage
+
+
+def test_single_scenario_result_is_one_attack():
+    scenario = Scenario(1, (8,), 2, {'defense': 14})
+    result = evaluate(scenario)
+
+    single = turn_damage(result)
+    assert single.expected_damage == turn_damage([result]).expected_damage
+    assert single.expected_damage == turn_damage(scenario).expected_damage
+    assert abs(single.expected_damage - result.expected_damage) < 1e-12
+
+
+def test_list_and_separate_attacks_agree():
+    result = evaluate(Scenario(0, (6,), 3, {'defense': 12}))
+    assert turn_damage((result, result)).to_dict() == turn_damage(result, result).to_dict()